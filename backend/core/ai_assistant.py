@@ -1,9 +1,15 @@
-import os
 import json
-import google.generativeai as genai
+import logging
+import re
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from datetime import date, timedelta
 from django.db.models import Sum
-from .models import Student, Transaction, Task, StudentStatus, SponsorshipStatus, Sponsor
+from . import llm, reports
+from .caching import TTLLRUCache
+from .models import Student, Transaction, Task, StudentStatus, SponsorshipStatus, Gender
+
+logger = logging.getLogger(__name__)
 
 # --- Tool Definitions ---
 
@@ -116,76 +122,120 @@ def generate_report(
     end_date: str = None
 ) -> str:
     """
-    Generates a report and returns the data and instructions to the frontend.
+    Generates a report file and returns a download link to the frontend.
     Args:
         report_type (str): The type of report. Supported: 'student_roster', 'financial'.
-        file_format (str): The format to download. Supported: 'csv', 'pdf'.
+        file_format (str): The format to download. Supported: 'csv', 'xlsx', 'pdf'.
         student_status (str): Filter for student status.
         sponsorship_status (str): Filter for sponsorship status.
         sponsor_name (str): The name of the sponsor to filter by.
         start_date (str): Start date for financial report (YYYY-MM-DD).
         end_date (str): End date for financial report (YYYY-MM-DD).
     """
-    if report_type == 'student_roster':
-        filters = {}
-        if student_status: filters['student_status'] = student_status
-        if sponsorship_status: filters['sponsorship_status'] = sponsorship_status
-        if sponsor_name:
-            try:
-                sponsor = Sponsor.objects.get(name__iexact=sponsor_name)
-                filters['sponsor'] = sponsor.id
-            except Sponsor.DoesNotExist:
-                return f"Sponsor named '{sponsor_name}' not found."
-        
-        students = Student.objects.filter(**filters).select_related('sponsor')
-        data = [{
-            'studentId': s.student_id, 'firstName': s.first_name, 'lastName': s.last_name,
-            'dateOfBirth': s.date_of_birth.isoformat(), 'gender': s.gender, 'studentStatus': s.student_status,
-            'sponsorshipStatus': s.sponsorship_status, 'sponsorName': s.sponsor.name if s.sponsor else 'N/A',
-            'school': s.school, 'currentGrade': s.current_grade
-        } for s in students]
-        
-        # This special string tells the frontend to trigger a download
-        return f"[GENERATE_REPORT]\n{json.dumps({'type': 'student_roster', 'format': file_format, 'data': data})}"
+    try:
+        if report_type == 'student_roster':
+            students = reports.roster_queryset(student_status, sponsorship_status, sponsor_name)
+            columns, rows, extra = reports.ROSTER_COLUMNS, reports.roster_rows(students), {}
+            module, summary = 'students', None
+            filename = f"AI_Student_Roster_{date.today().isoformat()}"
+        elif report_type == 'financial':
+            if not start_date or not end_date:
+                return "Start and end dates are required for financial reports."
+            transactions = Transaction.objects.filter(date__range=[start_date, end_date])
+            totals = reports.financial_totals(transactions)
+            columns, rows = reports.FINANCIAL_COLUMNS, reports.financial_rows(transactions)
+            module, summary = 'transactions', reports.financial_summary(totals, start_date, end_date)
+            extra = {'startDate': start_date, 'endDate': end_date, **{key: float(value) for key, value in totals.items()}}
+            filename = f"AI_Financial_Report_{start_date}_to_{end_date}"
+        else:
+            return f"Unsupported report type: {report_type}"
 
-    elif report_type == 'financial':
-        if not start_date or not end_date:
-            return "Start and end dates are required for financial reports."
-        
-        transactions = Transaction.objects.filter(date__range=[start_date, end_date])
-        data = [{
-            'date': t.date.isoformat(), 'description': t.description, 'category': t.category,
-            'type': t.type, 'amount': float(t.amount)
-        } for t in transactions]
-        
-        return f"[GENERATE_REPORT]\n{json.dumps({'type': 'financial', 'format': file_format, 'data': data, 'startDate': start_date, 'endDate': end_date})}"
-        
-    return f"Unsupported report type: {report_type}"
+        if file_format == 'pdf':
+            # PDFs are laid out in the browser, so this format still ships the rows inline.
+            payload = {'data': [{key: row[key] for key, _ in columns} for row in rows]}
+        else:
+            payload = reports.write_report(columns, rows, file_format, filename, module, summary)
+    except reports.ReportError as e:
+        return str(e)
+    # This special string tells the frontend to trigger a download
+    return f"[GENERATE_REPORT]\n{json.dumps({'type': report_type, 'format': file_format, **payload, **extra}, cls=DjangoJSONEncoder)}"
 
 # --- Main Assistant Logic ---
 
+ASSISTANT_TOOLS = [
+    get_student_count,
+    list_students,
+    get_financial_summary,
+    get_tasks_summary,
+    generate_report,
+]
+
 def query_assistant(prompt: str, history: list) -> str:
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
+    try:
+        client = llm.get_client()
+    except llm.LLMNotConfigured:
         return "The AI Assistant is not configured. An API key is missing on the server."
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(
-            model_name='gemini-2.5-flash',
-            tools=[
-                get_student_count,
-                list_students,
-                get_financial_summary,
-                get_tasks_summary,
-                generate_report, # <-- ADD THE NEW TOOL HERE
-            ]
-        )
-        
-        chat = model.start_chat(history=history)
-        response = chat.send_message(prompt)
-        
-        return response.text
-    except Exception as e:
-        print(f"Gemini API Error: {e}")
-        return "I'm sorry, I encountered a problem while trying to answer your question. Please check the server logs for more details."
\ No newline at end of file
+        return client.chat(prompt, history, tools=ASSISTANT_TOOLS)
+    except Exception:
+        logger.exception("Gemini API error while answering an assistant query")
+        return "I'm sorry, I encountered a problem while trying to answer your question. Please check the server logs for more details."
+
+STUDENT_FILTER_PROMPT = """You are an expert data analyst for an NGO. Your task is to convert a user's natural language query into a JSON object of filters for a student database.
+            The available filters and their exact possible values are:
+            - "student_status": ["Active", "Inactive", "Pending Qualification"]
+            - "sponsorship_status": ["Sponsored", "Unsponsored"]
+            - "gender": ["Male", "Female"]
+            - "sponsor_name": This should be a string representing the sponsor's name if mentioned.
+            - "search": This should be a string for a general text search on the student's first or last name if a specific name is mentioned.
+            Analyze the user's query: "{query}"
+            Your response MUST be only the JSON object, with no extra text, explanation, or formatting like markdown ```json blocks.
+            If a filter is not mentioned, do not include it in the JSON. If a name is mentioned, use the "search" key. If a sponsor's name is mentioned, use the "sponsor_name" key."""
+
+class FilterTranslationError(Exception):
+    """Raised with a user-facing message when a query cannot be turned into student filters."""
+
+# Keyed by normalized query; holds only translations that passed valid_student_filters.
+student_filter_cache = TTLLRUCache(settings.AI_FILTER_CACHE_SIZE, settings.AI_FILTER_CACHE_TTL)
+STUDENT_FILTER_CHOICES = {
+    'student_status': StudentStatus,
+    'sponsorship_status': SponsorshipStatus,
+    'gender': Gender,
+}
+STUDENT_FILTER_TEXT_KEYS = {'sponsor_name', 'search'}
+
+def normalize_filter_query(query: str) -> str:
+    """'  Unsponsored GIRLS!' and 'unsponsored girls' share one cache entry."""
+    return ' '.join(re.findall(r'\w+', query.lower()))
+
+def valid_student_filters(filters) -> bool:
+    """Checks a translation against the filter keys and the current choice values."""
+    if not isinstance(filters, dict):
+        return False
+    for key, value in filters.items():
+        if key in STUDENT_FILTER_CHOICES:
+            if value not in STUDENT_FILTER_CHOICES[key].values: return False
+        elif key not in STUDENT_FILTER_TEXT_KEYS or not isinstance(value, str):
+            return False
+    return True
+
+def cached_student_filters(query: str):
+    """Returns the cached translation for `query`, or None on a miss."""
+    return student_filter_cache.get(normalize_filter_query(query), validate=valid_student_filters)
+
+def translate_student_filters(query: str) -> dict:
+    try:
+        text = llm.get_client().generate(STUDENT_FILTER_PROMPT.format(query=query))
+    except llm.LLMNotConfigured:
+        raise FilterTranslationError("AI Assistant is not configured on the server.")
+    except Exception:
+        logger.exception("Gemini API error while translating student filters")
+        raise FilterTranslationError("There was a problem communicating with the AI assistant.")
+    try:
+        filters = json.loads(text.strip().replace("```json", "").replace("```", "").strip())
+    except json.JSONDecodeError:
+        raise FilterTranslationError("The AI returned an invalid format. Please try rephrasing your query.")
+    if valid_student_filters(filters):
+        student_filter_cache.set(normalize_filter_query(query), filters)
+    return filters
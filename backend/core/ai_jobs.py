@@ -0,0 +1,59 @@
+# backend/core/ai_jobs.py
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from . import ai_assistant, background
+from .models import AIJob
+
+logger = logging.getLogger(__name__)
+
+def _assistant_query(payload):
+    return {'response': ai_assistant.query_assistant(payload['prompt'], payload.get('history', []))}
+
+def _student_filters(payload):
+    return ai_assistant.translate_student_filters(payload['query'])
+
+HANDLERS = {
+    AIJob.Kind.ASSISTANT_QUERY: _assistant_query,
+    AIJob.Kind.STUDENT_FILTERS: _student_filters,
+}
+
+def run_job(job_id):
+    # Claim the job atomically so it can never run twice.
+    if not AIJob.objects.filter(pk=job_id, status=AIJob.Status.PENDING).update(status=AIJob.Status.RUNNING, started_at=timezone.now()):
+        return
+    job = AIJob.objects.get(pk=job_id)
+    try:
+        result, status, error = HANDLERS[job.kind](job.payload), AIJob.Status.SUCCEEDED, ''
+    except ai_assistant.FilterTranslationError as e:
+        result, status, error = None, AIJob.Status.FAILED, str(e)
+    except Exception:
+        logger.exception("AI job %s failed", job_id)
+        result, status, error = None, AIJob.Status.FAILED, "An internal error occurred."
+    AIJob.objects.filter(pk=job_id, status=AIJob.Status.RUNNING).update(
+        status=status, result=result, error=error, finished_at=timezone.now()
+    )
+
+def submit_job(user, kind, payload):
+    """Creates a pending job and hands it to the worker pool once the row is committed."""
+    job = AIJob.objects.create(user=user, kind=kind, payload=payload)
+    transaction.on_commit(lambda: background.submit(run_job, job.pk))
+    job.refresh_from_db()
+    return job
+
+def record_completed_job(user, kind, payload, result):
+    """Stores a job answered without the worker pool (e.g. from a cache) so clients see the usual shape."""
+    return AIJob.objects.create(
+        user=user, kind=kind, payload=payload, result=result,
+        status=AIJob.Status.SUCCEEDED, started_at=timezone.now(), finished_at=timezone.now(),
+    )
+
+def expire_stale_jobs(queryset):
+    """Fails unfinished jobs older than AI_JOB_TIMEOUT (their worker process died or hung)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.AI_JOB_TIMEOUT)
+    queryset.filter(status__in=[AIJob.Status.PENDING, AIJob.Status.RUNNING], created_at__lt=cutoff).update(
+        status=AIJob.Status.FAILED, error="The AI assistant took too long to respond. Please try again.", finished_at=timezone.now()
+    )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Connects the cache invalidation, search indexing and sponsorship status receivers.
+        from . import caching, permissions, search, sponsorships  # noqa: F401
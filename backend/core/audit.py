@@ -0,0 +1,87 @@
+# backend/core/audit.py
+
+import threading
+import weakref
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.fields.files import FieldFile
+from .models import AuditLog
+
+_local = threading.local()
+
+class AuditBuffer:
+    """Collects AuditLog rows for one savepoint and writes them with a single bulk_create on commit."""
+
+    def __init__(self, using):
+        self.using = using
+        self.entries = []
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        if entries:
+            AuditLog.objects.using(self.using).bulk_create(entries, batch_size=500)
+
+def _pending_buffer(using):
+    """
+    The buffer for the innermost savepoint of the current transaction. Its flush is
+    registered inside that savepoint, so rolling the savepoint back discards the flush
+    and the entries with it, while releasing it keeps them for the outer commit.
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = weakref.WeakValueDictionary()
+    connection = transaction.get_connection(using)
+    key = (using, *(sid for sid in connection.savepoint_ids if sid))
+    # The registered flush holds the only reference to a buffer: once the transaction
+    # commits, or rollback discards the callback, the entry disappears from `buffers`.
+    buffer = buffers.get(key)
+    if buffer is None:
+        buffer = buffers[key] = AuditBuffer(using)
+        transaction.on_commit(buffer.flush, using=using)
+    return buffer
+
+def _json_value(value):
+    if isinstance(value, FieldFile):
+        return value.name or None
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    return DjangoJSONEncoder().default(value)
+
+def snapshot_fields(instance, field_names):
+    """Captures the raw values of the named concrete fields (FKs by id) before an update."""
+    return {
+        field.name: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields if field.name in field_names
+    }
+
+def diff_snapshot(instance, snapshot):
+    """Returns {field: {'old': ..., 'new': ...}} for snapshot fields whose value changed, JSON-ready."""
+    changes = {}
+    for field in instance._meta.concrete_fields:
+        if field.name not in snapshot:
+            continue
+        old_value, new_value = snapshot[field.name], field.value_from_object(instance)
+        if old_value != new_value:
+            changes[field.name] = {'old': _json_value(old_value), 'new': _json_value(new_value)}
+    return changes
+
+def log_action(user, instance, action, changes=None, using=DEFAULT_DB_ALIAS):
+    """
+    Records an audit entry for `instance`. Inside a transaction the entry is buffered
+    and written together with the transaction's other entries when it commits;
+    in autocommit mode it is written immediately.
+    """
+    entry = AuditLog(
+        user=user,
+        user_identifier=str(user) if user else "Anonymous",
+        action=action,
+        content_type=ContentType.objects.db_manager(using).get_for_model(instance.__class__),
+        object_id=instance.pk,
+        object_repr=str(instance),
+        changes=changes,
+    )
+    if not transaction.get_connection(using).in_atomic_block:
+        entry.save(using=using)
+        return
+    _pending_buffer(using).entries.append(entry)
@@ -0,0 +1,95 @@
+# backend/core/audit_archive.py
+
+import gzip
+import heapq
+import json
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import AuditLog, AuditLogArchive
+
+ARCHIVE_CHUNK_SIZE = 2000
+# The fields AuditLogSerializer exposes; archived rows are returned in the same shape.
+OUTPUT_FIELDS = ('id', 'timestamp', 'user_identifier', 'action', 'content_type', 'object_id', 'object_repr', 'changes')
+
+def _month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _next_month(month_start):
+    return (month_start + timedelta(days=32)).replace(day=1)
+
+def _archive_path(file_name):
+    return os.path.join(settings.AUDIT_ARCHIVE_ROOT, os.path.basename(file_name))
+
+def _archive_row(log):
+    return {
+        'id': log.id, 'timestamp': log.timestamp.isoformat(), 'user_id': log.user_id,
+        'user_identifier': log.user_identifier, 'action': log.action,
+        'content_type': str(log.content_type), 'model': log.content_type.model,
+        'object_id': log.object_id, 'object_repr': log.object_repr, 'changes': log.changes,
+    }
+
+def _archive_range(start, end):
+    logs = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    file_name = f'auditlog-{start:%Y-%m}-{uuid.uuid4().hex[:8]}.ndjson.gz'
+    path = _archive_path(file_name)
+    partial = f'{path}.partial'
+    row_count = max_id = 0
+    try:
+        with gzip.open(partial, 'wt', encoding='utf-8') as f:
+            for log in logs.select_related('content_type').order_by('timestamp', 'id').iterator(chunk_size=ARCHIVE_CHUNK_SIZE):
+                f.write(json.dumps(_archive_row(log), cls=DjangoJSONEncoder) + '\n')
+                row_count, max_id = row_count + 1, max(max_id, log.id)
+        os.replace(partial, path)
+        # The file is complete before any row goes; the catalogue entry and the delete commit together.
+        with transaction.atomic():
+            archive = AuditLogArchive.objects.create(start=start, end=end, file_name=file_name, row_count=row_count)
+            logs.filter(id__lte=max_id).delete()
+    except BaseException:
+        for leftover in (partial, path):
+            if os.path.exists(leftover): os.remove(leftover)
+        raise
+    return archive
+
+def archive_logs(older_than_days=None):
+    """
+    Moves AuditLog rows older than `older_than_days` (default AUDIT_LOG_RETENTION_DAYS) into
+    gzip NDJSON files, one per calendar month, and returns the AuditLogArchive entries created.
+    """
+    days = settings.AUDIT_LOG_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    os.makedirs(settings.AUDIT_ARCHIVE_ROOT, exist_ok=True)
+    archives = []
+    old_logs = AuditLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True)
+    while (oldest := old_logs.first()) is not None:
+        start = _month_start(oldest)
+        archives.append(_archive_range(start, min(_next_month(start), cutoff)))
+    return archives
+
+def _archived_rows(archive):
+    with gzip.open(_archive_path(archive.file_name), 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+def read_archived(start, end, action=None, object_type=None, limit=None):
+    """
+    Returns (rows, truncated): archived rows with start <= timestamp < end, newest first,
+    at most `limit` (default AUDIT_ARCHIVE_QUERY_LIMIT). Only archives overlapping the
+    range are opened.
+    """
+    limit = limit or settings.AUDIT_ARCHIVE_QUERY_LIMIT
+    def matching():
+        for archive in AuditLogArchive.objects.filter(start__lt=end, end__gt=start):
+            for row in _archived_rows(archive):
+                timestamp = parse_datetime(row['timestamp'])
+                if not start <= timestamp < end: continue
+                if action and row['action'] != action: continue
+                if object_type and row['model'] != object_type: continue
+                yield timestamp, row['id'], row
+    newest = heapq.nlargest(limit + 1, matching(), key=lambda item: item[:2])
+    return [{field: row[field] for field in OUTPUT_FIELDS} for _, _, row in newest[:limit]], len(newest) > limit
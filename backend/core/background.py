@@ -0,0 +1,38 @@
+# backend/core/background.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.AI_WORKER_THREADS, thread_name_prefix='background')
+        return _executor
+
+def _run(fn, args, kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(fn, '__name__', fn))
+    finally:
+        # Worker threads hold their own DB connections; release them between tasks.
+        connections.close_all()
+
+def submit(fn, *args, **kwargs):
+    """
+    Runs `fn` on this process's background thread pool, off the request thread.
+    With BACKGROUND_TASKS_EAGER it runs inline instead, which is what tests use.
+    """
+    if settings.BACKGROUND_TASKS_EAGER:
+        fn(*args, **kwargs)
+        return
+    _get_executor().submit(_run, fn, args, kwargs)
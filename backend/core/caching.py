@@ -0,0 +1,121 @@
+# backend/core/caching.py
+
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+from .models import Student, Sponsor
+
+def _version_key(model):
+    return f'table_version:{model._meta.label_lower}'
+
+def get_table_version(model):
+    """
+    Returns an opaque token that changes whenever `model`'s table is written through the ORM.
+    It outlives the payloads cached under it (see LOOKUP_VERSION_TIMEOUT). A missing token
+    (restart, eviction, expiry) is replaced by a fresh one, which simply invalidates
+    everything cached under the old token.
+    """
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, settings.LOOKUP_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+def bump_table_version(*models):
+    """
+    Replaces the models' version tokens once the current transaction commits (at once in
+    autocommit). Bumping earlier would let a concurrent lookup cache the pre-commit rows
+    under the new token.
+    """
+    def bump():
+        for model in models:
+            cache.set(_version_key(model), uuid4().hex, settings.LOOKUP_VERSION_TIMEOUT)
+    transaction.on_commit(bump)
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+def versioned_lookup_response(request, model, build_payload):
+    """
+    Serves a lookup payload keyed on `model`'s table version. Unchanged tables answer
+    If-None-Match with 304 and no database work; otherwise the payload is built once per
+    version and then reused from the cache.
+    """
+    version = get_table_version(model)
+    etag = f'"{model._meta.model_name}-{version}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if _etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    payload_key = f'lookup:{model._meta.label_lower}:{version}'
+    payload = cache.get(payload_key)
+    if payload is None:
+        payload = build_payload()
+        cache.set(payload_key, payload, settings.LOOKUP_CACHE_TIMEOUT)
+    return Response(payload, headers=headers)
+
+class TTLLRUCache:
+    """
+    Thread-safe in-process mapping with a per-entry TTL and least-recently-used eviction.
+    `get` can take a validator; entries that no longer pass it are dropped and count as misses.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.rejections = 0
+
+    def get(self, key, default=None, validate=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None and validate is not None and not validate(entry[1]):
+                del self._data[key]
+                self.rejections += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.rejections = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data), 'maxSize': self.maxsize, 'ttlSeconds': self.ttl,
+                'hits': self.hits, 'misses': self.misses, 'hitRate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions, 'expirations': self.expirations, 'rejections': self.rejections,
+            }
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Sponsor)
+def bump_lookup_version(sender, **kwargs):
+    bump_table_version(sender)
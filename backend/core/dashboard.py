@@ -0,0 +1,100 @@
+# backend/core/dashboard.py
+
+from datetime import date, timedelta
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncMonth
+from .models import (
+    Student, Transaction, GovernmentFiling, StudentStatus, MonthlyTransactionRollup
+)
+
+INCOME, EXPENSE = Transaction.TransactionType.INCOME, Transaction.TransactionType.EXPENSE
+
+def shift_month(month_start, months):
+    """Returns the first day of the month `months` away from `month_start`."""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def ledger_monthly_totals(start=None, end=None):
+    """One GROUP BY (month, type) pass over the Transaction ledger."""
+    queryset = Transaction.objects.all()
+    if start: queryset = queryset.filter(date__gte=start)
+    if end: queryset = queryset.filter(date__lte=end)
+    return (queryset.annotate(month=TruncMonth('date'))
+            .values('month', 'type')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by())
+
+@transaction.atomic
+def rebuild_monthly_rollup():
+    """Recomputes the materialized monthly rollup from the ledger. Returns the number of buckets written."""
+    MonthlyTransactionRollup.objects.all().delete()
+    buckets = [
+        MonthlyTransactionRollup(month=row['month'], type=row['type'], total=row['total'] or 0, count=row['count'])
+        for row in ledger_monthly_totals()
+    ]
+    MonthlyTransactionRollup.objects.bulk_create(buckets, batch_size=500)
+    return len(buckets)
+
+def monthly_breakdown(end_date, months=12):
+    """Income/expense per month for the `months` months ending with `end_date`'s month, oldest first."""
+    last_month = end_date.replace(day=1)
+    first_month = shift_month(last_month, -(months - 1))
+    totals = {
+        (row.month, row.type): row.total
+        for row in MonthlyTransactionRollup.objects.filter(month__range=[first_month, last_month])
+    }
+    breakdown = []
+    for i in range(months):
+        month = shift_month(first_month, i)
+        breakdown.append({
+            'month': month.strftime('%b %y'),
+            'income': float(totals.get((month, INCOME), 0)),
+            'expense': float(totals.get((month, EXPENSE), 0)),
+        })
+    return breakdown
+
+def _active_in_period(start, end):
+    return (Q(eep_enroll_date__lte=end) & Q(student_status=StudentStatus.ACTIVE)
+            & (Q(out_of_program_date__gte=start) | Q(out_of_program_date__isnull=True)))
+
+def get_dashboard_stats(start_date, end_date):
+    """Builds the dashboard payload for the given period and the equally long period before it."""
+    prev_end_date = start_date - timedelta(days=1)
+    prev_start_date = prev_end_date - (end_date - start_date)
+
+    ledger = Transaction.objects.filter(date__range=[prev_start_date, end_date]).aggregate(
+        income=Sum('amount', filter=Q(type=INCOME, date__gte=start_date)),
+        expense=Sum('amount', filter=Q(type=EXPENSE, date__gte=start_date)),
+        prev_income=Sum('amount', filter=Q(type=INCOME, date__lte=prev_end_date)),
+        prev_expense=Sum('amount', filter=Q(type=EXPENSE, date__lte=prev_end_date)),
+    )
+    students = Student.objects.filter(eep_enroll_date__lte=end_date).aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=_active_in_period(start_date, end_date)),
+        prev_total=Count('pk', filter=Q(eep_enroll_date__lte=prev_end_date)),
+        prev_active=Count('pk', filter=_active_in_period(prev_start_date, prev_end_date)),
+    )
+    net_balance = float((ledger['income'] or 0) - (ledger['expense'] or 0))
+    prev_net_balance = float((ledger['prev_income'] or 0) - (ledger['prev_expense'] or 0))
+
+    upcoming_filings = GovernmentFiling.objects.filter(due_date__gte=date.today()).count()
+    status_dist = {
+        item['student_status']: item['value']
+        for item in Student.objects.filter(eep_enroll_date__lte=end_date).values('student_status').annotate(value=Count('student_id')).order_by()
+    }
+    return {
+        'stats': {
+            'total_students': students['total'],
+            'active_students': students['active'],
+            'net_balance': net_balance,
+            'upcoming_filings': upcoming_filings,
+        },
+        'trends': {
+            'total_students': students['prev_total'],
+            'active_students': students['prev_active'],
+            'net_balance': prev_net_balance,
+        },
+        'student_status_distribution': status_dist,
+        'monthly_breakdown': monthly_breakdown(end_date),
+    }
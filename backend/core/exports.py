@@ -0,0 +1,96 @@
+# backend/core/exports.py
+
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+EXPORT_CHUNK_SIZE = 2000
+
+class StreamingExportRenderer(BaseRenderer):
+    """
+    Registers an export format with DRF's content negotiation (?format=...).
+    The export itself is written by `stream_export`; this renderer only handles
+    the non-streamed responses of the same request, such as validation errors.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None: return b''
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+class CSVExportRenderer(StreamingExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+class NDJSONExportRenderer(StreamingExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+class JSONStreamExportRenderer(StreamingExportRenderer):
+    media_type = 'application/json'
+    format = 'json-stream'
+
+EXPORT_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [
+    CSVExportRenderer, NDJSONExportRenderer, JSONStreamExportRenderer,
+]
+EXPORT_FORMATS = {renderer.format for renderer in EXPORT_RENDERER_CLASSES if issubclass(renderer, StreamingExportRenderer)}
+
+def is_export_request(request):
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is not None and renderer.format in EXPORT_FORMATS
+
+def _dumps(row):
+    return json.dumps(row, cls=DjangoJSONEncoder)
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)): return _dumps(value)
+    return '' if value is None else value
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to the csv writer's caller."""
+    def write(self, value):
+        return value
+
+def _csv_lines(rows):
+    writer, header = csv.writer(_Echo()), None
+    for row in rows:
+        if header is None:
+            header = list(row.keys())
+            yield writer.writerow(header)
+        yield writer.writerow([_csv_value(row.get(column)) for column in header])
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield _dumps(row) + '\n'
+
+def _json_array(rows):
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',' if index else '') + _dumps(row)
+    yield ']'
+
+_WRITERS = {
+    'csv': _csv_lines,
+    'ndjson': _ndjson_lines,
+    'json-stream': _json_array,
+}
+
+def iter_representations(queryset, serializer, chunk_size=EXPORT_CHUNK_SIZE):
+    """Serializes a queryset row by row without holding more than one chunk of model instances."""
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(instance)
+
+def stream_export(request, queryset, serializer, filename):
+    """
+    Streams `queryset` in the format negotiated for `request`. `serializer` is an
+    unbound serializer instance (e.g. `self.get_serializer()`) used for each row.
+    """
+    renderer = request.accepted_renderer
+    rows = iter_representations(queryset, serializer)
+    response = StreamingHttpResponse(_WRITERS[renderer.format](rows), content_type=f'{renderer.media_type}; charset=utf-8')
+    if renderer.format == 'csv':
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
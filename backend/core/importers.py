@@ -0,0 +1,93 @@
+# backend/core/importers.py
+
+import time
+from django.core.exceptions import ValidationError
+from . import search
+from .caching import bump_table_version
+from .models import SearchDocument, Student
+
+IMPORT_BATCH_SIZE = 500
+REQUIRED_FIELDS_FOR_NEW = ['student_id', 'first_name', 'last_name']
+OPTIONAL_DATE_FIELDS = ['date_of_birth', 'eep_enroll_date', 'application_date', 'out_of_program_date']
+IMPORTABLE_FIELDS = {field.name for field in Student._meta.concrete_fields} - {'student_id'}
+
+def _validation_message(error):
+    if hasattr(error, 'message_dict'):
+        return '; '.join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+    return ' '.join(error.messages)
+
+def import_students(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Creates or updates students from spreadsheet rows in a fixed number of queries.
+
+    Every row is validated in memory first; rows that fail are reported and skipped
+    without affecting the rest. Valid rows are then written with chunked
+    bulk_create/bulk_update. Callers are expected to wrap this in a transaction.
+    """
+    started = time.perf_counter()
+    errors = []
+    incoming_ids = [row.get('student_id') for row in rows if isinstance(row, dict) and row.get('student_id')]
+    existing_students = Student.objects.in_bulk(incoming_ids)
+    to_create, to_update, update_fields, seen_ids = [], [], set(), set()
+
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"id": f"Row {index + 1}", "message": "Expected an object."})
+            continue
+        student_id = row.get('student_id')
+        if not student_id:
+            errors.append({"id": "Unknown", "message": "Missing student_id."})
+            continue
+        if student_id in seen_ids:
+            errors.append({"id": student_id, "message": "Duplicate student_id in this import."})
+            continue
+        seen_ids.add(student_id)
+
+        values = {key: value for key, value in row.items() if key != 'student_id'}
+        for field in OPTIONAL_DATE_FIELDS:
+            if field in values and not values[field]: values.pop(field)
+        if unknown_fields := set(values) - IMPORTABLE_FIELDS:
+            errors.append({"id": student_id, "message": f"Unknown fields: {', '.join(sorted(unknown_fields))}"})
+            continue
+
+        student = existing_students.get(student_id)
+        is_existing = student is not None
+        if not is_existing:
+            missing_fields = [field for field in REQUIRED_FIELDS_FOR_NEW if not row.get(field)]
+            if missing_fields:
+                errors.append({"id": student_id, "message": f"Missing required fields for new student: {', '.join(missing_fields)}"})
+                continue
+            student = Student(student_id=student_id)
+
+        for field, value in values.items(): setattr(student, field, value)
+        try:
+            # Existing rows only re-validate the columns being imported.
+            exclude = IMPORTABLE_FIELDS - set(values) if is_existing else None
+            student.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            errors.append({"id": student_id, "message": _validation_message(e)})
+            continue
+
+        if is_existing:
+            to_update.append(student)
+            update_fields.update(values)
+        else:
+            to_create.append(student)
+
+    if to_create: Student.objects.bulk_create(to_create, batch_size=batch_size)
+    if to_update and update_fields: Student.objects.bulk_update(to_update, sorted(update_fields), batch_size=batch_size)
+    # bulk_create/bulk_update bypass the save signals that normally invalidate cached lookups
+    # and keep the search index current.
+    if to_create or to_update:
+        bump_table_version(Student)
+        search.index_objects(SearchDocument.Kind.STUDENT, to_create + to_update, batch_size)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "createdCount": len(to_create),
+        "updatedCount": len(to_update),
+        "skippedCount": len(errors),
+        "errors": [f"{err['id']}: {err['message']}" for err in errors],
+        "durationMs": round(elapsed * 1000, 1),
+        "rowsPerSecond": round(len(rows) / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,177 @@
+# backend/core/llm.py
+
+import logging
+import threading
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gemini-2.5-flash'
+
+class LLMNotConfigured(Exception):
+    pass
+
+class LLMMetrics:
+    """Process-wide counters for LLM calls, grouped by operation ('generate', 'chat')."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def record(self, operation, latency, usage=None, tool_calls=0, failed=False):
+        usage = usage or {}
+        with self._lock:
+            stats = self._operations.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'totalLatencyMs': 0.0, 'maxLatencyMs': 0.0,
+                'promptTokens': 0, 'outputTokens': 0, 'totalTokens': 0, 'toolCalls': 0,
+            })
+            latency_ms = latency * 1000
+            stats['calls'] += 1
+            stats['errors'] += int(failed)
+            stats['totalLatencyMs'] += latency_ms
+            stats['maxLatencyMs'] = max(stats['maxLatencyMs'], latency_ms)
+            stats['promptTokens'] += usage.get('prompt_tokens', 0)
+            stats['outputTokens'] += usage.get('output_tokens', 0)
+            stats['totalTokens'] += usage.get('total_tokens', 0)
+            stats['toolCalls'] += tool_calls
+        logger.info(
+            "LLM %s: %.0f ms, %s tokens, %s tool calls%s",
+            operation, latency_ms, usage.get('total_tokens', '?'), tool_calls, ' (failed)' if failed else '',
+        )
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: {**stats, 'avgLatencyMs': round(stats['totalLatencyMs'] / stats['calls'], 1)}
+                for operation, stats in self._operations.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+metrics = LLMMetrics()
+
+class BaseLLMClient:
+    """
+    Times every call and records token usage and tool calls in `metrics`.
+    Subclasses implement _generate/_chat returning (text, usage dict, tool call count).
+    """
+
+    def __init__(self, api_key=None, model_name=DEFAULT_MODEL, timeout=None):
+        self.model_name, self.timeout = model_name, timeout
+
+    def _instrumented(self, operation, call, *args):
+        started = time.perf_counter()
+        try:
+            text, usage, tool_calls = call(*args)
+        except Exception:
+            metrics.record(operation, time.perf_counter() - started, failed=True)
+            raise
+        metrics.record(operation, time.perf_counter() - started, usage, tool_calls)
+        return text
+
+    def generate(self, prompt):
+        return self._instrumented('generate', self._generate, prompt)
+
+    def chat(self, prompt, history, tools=()):
+        return self._instrumented('chat', self._chat, prompt, history, tuple(tools))
+
+class GeminiClient(BaseLLMClient):
+    """Wraps google.generativeai; models are built once per tool set and reused for every call."""
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL, timeout=None):
+        if not api_key:
+            raise LLMNotConfigured("GOOGLE_API_KEY is not set.")
+        super().__init__(api_key, model_name, timeout)
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self._models = {}
+        self._models_lock = threading.Lock()
+
+    def _model(self, tools=()):
+        with self._models_lock:
+            if tools not in self._models:
+                self._models[tools] = self.genai.GenerativeModel(model_name=self.model_name, tools=list(tools) or None)
+            return self._models[tools]
+
+    def _request_options(self):
+        return {'timeout': self.timeout} if self.timeout else None
+
+    @staticmethod
+    def _usage(response):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None: return {}
+        return {
+            'prompt_tokens': usage.prompt_token_count or 0,
+            'output_tokens': usage.candidates_token_count or 0,
+            'total_tokens': usage.total_token_count or 0,
+        }
+
+    def _generate(self, prompt):
+        response = self._model().generate_content(prompt, request_options=self._request_options())
+        return response.text, self._usage(response), 0
+
+    def _chat(self, prompt, history, tools):
+        chat = self._model(tools).start_chat(history=history, enable_automatic_function_calling=bool(tools))
+        response = chat.send_message(prompt, request_options=self._request_options())
+        # Automatic function calling appends each call and its result to the chat history.
+        tool_calls = sum(
+            1 for content in chat.history[len(history):] for part in content.parts if part.function_call.name
+        )
+        return response.text, self._usage(response), tool_calls
+
+class FakeLLMClient(BaseLLMClient):
+    """
+    Deterministic stand-in for tests and offline development. Replies queued on the
+    client's `replies` are returned in order; otherwise the prompt is echoed. Prompts
+    are recorded on `calls`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replies, self.calls = [], []
+
+    def _reply(self, prompt):
+        self.calls.append(prompt)
+        text = self.replies.pop(0) if self.replies else f"Fake response to: {prompt}"
+        return text, {'prompt_tokens': len(prompt.split()), 'output_tokens': len(text.split()), 'total_tokens': len(prompt.split()) + len(text.split())}, 0
+
+    def _generate(self, prompt):
+        return self._reply(prompt)
+
+    def _chat(self, prompt, history, tools):
+        return self._reply(prompt)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client():
+    """
+    Returns the process-wide client named by settings.AI_LLM_CLIENT, building it on first
+    use so processes that never call the assistant never import or configure the SDK.
+    Raises LLMNotConfigured without credentials.
+    """
+    key = (settings.AI_LLM_CLIENT, settings.GOOGLE_API_KEY, settings.AI_MODEL_NAME, settings.AI_REQUEST_TIMEOUT)
+    with _clients_lock:
+        if key not in _clients:
+            client_class = import_string(settings.AI_LLM_CLIENT)
+            _clients[key] = client_class(
+                api_key=settings.GOOGLE_API_KEY, model_name=settings.AI_MODEL_NAME, timeout=settings.AI_REQUEST_TIMEOUT,
+            )
+        return _clients[key]
+
+def clear_clients():
+    """Drops the cached clients so the next get_client() builds a fresh one."""
+    with _clients_lock:
+        _clients.clear()
+
+def is_configured():
+    try:
+        get_client()
+    except LLMNotConfigured:
+        return False
+    return True
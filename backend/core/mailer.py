@@ -0,0 +1,162 @@
+# backend/core/mailer.py
+
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from . import background
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+_drain_lock = threading.Lock()
+_retry_timer = None
+_retry_timer_lock = threading.Lock()
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS
+    ))
+
+def _due_ids(batch_size):
+    return list(
+        OutboundEmail.objects.filter(status=OutboundEmail.Status.QUEUED, next_attempt_at__lte=timezone.now())
+        .order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+
+def _claim_batch(batch_size):
+    """
+    Marks up to `batch_size` due messages as sending and returns them. Each claim writes
+    its own token in the conditional UPDATE and reads back only rows carrying it, so two
+    senders that saw the same due ids never share a message.
+    """
+    due = _due_ids(batch_size)
+    if not due:
+        return []
+    claim_token = uuid.uuid4().hex
+    # next_attempt_at doubles as the claim time, which is how recover_stuck spots abandoned rows.
+    OutboundEmail.objects.filter(id__in=due, status=OutboundEmail.Status.QUEUED).update(
+        status=OutboundEmail.Status.SENDING, next_attempt_at=timezone.now(), claim_token=claim_token,
+    )
+    return list(OutboundEmail.objects.filter(claim_token=claim_token, status=OutboundEmail.Status.SENDING))
+
+def _send_batch(messages):
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for message in messages:
+            email = EmailMessage(message.subject, message.body, message.from_email or None, message.to, connection=connection)
+            try:
+                email.send()
+                sent.append(message)
+            except Exception as e:
+                failed.append((message, e))
+    except Exception as e:
+        # The connection itself failed; nothing after this point was attempted.
+        done = {m.pk for m in sent} | {m.pk for m, _ in failed}
+        failed.extend((m, e) for m in messages if m.pk not in done)
+    finally:
+        try: connection.close()
+        except Exception: pass
+    return sent, failed
+
+def _record_results(sent, failed):
+    now = timezone.now()
+    if sent:
+        OutboundEmail.objects.filter(id__in=[m.pk for m in sent]).update(
+            status=OutboundEmail.Status.SENT, sent_at=now, attempts=F('attempts') + 1, last_error='',
+        )
+    for message, error in failed:
+        attempts = message.attempts + 1
+        gave_up = attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        logger.warning("Email %s attempt %s failed: %s", message.pk, attempts, error)
+        OutboundEmail.objects.filter(pk=message.pk).update(
+            attempts=attempts, last_error=str(error)[:2000],
+            status=OutboundEmail.Status.FAILED if gave_up else OutboundEmail.Status.QUEUED,
+            next_attempt_at=now if gave_up else now + retry_delay(attempts),
+        )
+
+def deliver_pending(batch_size=None):
+    """
+    Sends every due message, one connection per batch. Failures are rescheduled with
+    exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS. Returns (sent, failed) counts.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    total_sent = total_failed = 0
+    while messages := _claim_batch(batch_size):
+        sent, failed = _send_batch(messages)
+        _record_results(sent, failed)
+        total_sent, total_failed = total_sent + len(sent), total_failed + len(failed)
+    return total_sent, total_failed
+
+def recover_stuck(older_than=timedelta(minutes=10)):
+    """Requeues messages claimed more than `older_than` ago but never finished (their process died)."""
+    return OutboundEmail.objects.filter(
+        status=OutboundEmail.Status.SENDING, next_attempt_at__lt=timezone.now() - older_than
+    ).update(status=OutboundEmail.Status.QUEUED)
+
+def _schedule_retry():
+    global _retry_timer
+    next_due = (OutboundEmail.objects.filter(status=OutboundEmail.Status.QUEUED)
+                .order_by('next_attempt_at').values_list('next_attempt_at', flat=True).first())
+    if next_due is None:
+        return
+    delay = max((next_due - timezone.now()).total_seconds(), 0)
+    with _retry_timer_lock:
+        if _retry_timer is not None: _retry_timer.cancel()
+        _retry_timer = threading.Timer(delay, background.submit, args=(_drain,))
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+def _drain():
+    # One drain per process at a time; a drain already running will pick up new rows.
+    if not _drain_lock.acquire(blocking=False):
+        return
+    try:
+        deliver_pending()
+    finally:
+        _drain_lock.release()
+    if not settings.BACKGROUND_TASKS_EAGER:
+        _schedule_retry()
+
+def queue_email(subject, body, to, from_email=None):
+    """Adds a message to the outbox and wakes the background sender once the row is committed."""
+    message = OutboundEmail.objects.create(subject=subject, body=body, to=list(to), from_email=from_email or '')
+    transaction.on_commit(lambda: background.submit(_drain))
+    return message
+
+# --- Account emails ---
+
+def _set_password_link(user):
+    frontend_base_url = settings.CORS_ALLOWED_ORIGINS[0] if settings.CORS_ALLOWED_ORIGINS else 'http://localhost:5173'
+    uidb64, token = urlsafe_base64_encode(force_bytes(user.pk)), default_token_generator.make_token(user)
+    return f"{frontend_base_url}/#/reset-password/{uidb64}/{token}"
+
+def send_password_reset(email):
+    """Queues a reset link if `email` belongs to a user. Runs in the background so the
+    request's timing reveals nothing about whether the account exists."""
+    user = User.objects.filter(email__iexact=email).first()
+    if user is None:
+        return
+    queue_email(
+        'Set Your Password for NGO Dashboard',
+        f'Hello,\n\nPlease click the link below to set your password:\n\n{_set_password_link(user)}\n\nIf you did not request this, please ignore this email.\n\nThanks,\nNGO Dashboard Team',
+        [user.email], settings.ACCOUNT_EMAIL_FROM,
+    )
+
+def send_invitation(user, role_name):
+    queue_email(
+        'You have been invited to NGO Dashboard',
+        f'Hello,\n\nYou have been invited to NGO Dashboard as {role_name}. Click the link below to set your password and activate your account:\n\n{_set_password_link(user)}\n\nThanks,\nNGO Dashboard Team',
+        [user.email], settings.ACCOUNT_EMAIL_FROM,
+    )
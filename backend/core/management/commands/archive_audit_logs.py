@@ -0,0 +1,29 @@
+# backend/core/management/commands/archive_audit_logs.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core import audit_archive
+from core.models import AuditLog
+
+class Command(BaseCommand):
+    help = (
+        "Moves audit log rows older than the retention period into gzip NDJSON archive files, one per month. "
+        "Run it daily from cron; archived rows stay readable through /api/audit-logs/archived/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Retention in days (default: AUDIT_LOG_RETENTION_DAYS).")
+        parser.add_argument('--dry-run', action='store_true', help="Report how many rows would be archived without moving them.")
+
+    def handle(self, *args, **options):
+        days = settings.AUDIT_LOG_RETENTION_DAYS if options['days'] is None else options['days']
+        if options['dry_run']:
+            count = AuditLog.objects.filter(timestamp__lt=timezone.now() - timedelta(days=days)).count()
+            self.stdout.write(f"{count} audit log rows older than {days} days would be archived.")
+            return
+        archives = audit_archive.archive_logs(days)
+        for archive in archives:
+            self.stdout.write(f"Archived {archive.row_count} rows to {archive.file_name}.")
+        self.stdout.write(self.style.SUCCESS(f"{sum(a.row_count for a in archives)} rows archived into {len(archives)} files."))
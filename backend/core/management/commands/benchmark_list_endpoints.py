@@ -0,0 +1,189 @@
+# backend/core/management/commands/benchmark_list_endpoints.py
+
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core import views
+from core.models import (
+    Student, Transaction, Task, GovernmentFiling, AuditLog, Gender, StudentStatus, SponsorshipStatus
+)
+
+# (label, viewset, query params) — mirrors what the frontend list pages request.
+CASES = [
+    ('students: default ordering', views.StudentViewSet, {}),
+    ('students: student_status', views.StudentViewSet, {'student_status': StudentStatus.ACTIVE}),
+    ('students: sponsorship_status', views.StudentViewSet, {'sponsorship_status': SponsorshipStatus.UNSPONSORED}),
+    ('students: gender', views.StudentViewSet, {'gender': Gender.FEMALE}),
+    ('transactions: newest first', views.TransactionViewSet, {'ordering': '-date'}),
+    ('transactions: type', views.TransactionViewSet, {'type': 'Income', 'ordering': '-date'}),
+    ('transactions: category', views.TransactionViewSet, {'category': 'School Fees', 'ordering': '-date'}),
+    ('tasks: status', views.TaskViewSet, {'status': Task.TaskStatus.TO_DO, 'ordering': 'due_date'}),
+    ('tasks: priority', views.TaskViewSet, {'priority': Task.TaskPriority.HIGH, 'ordering': 'due_date'}),
+    ('filings: due date', views.GovernmentFilingViewSet, {'ordering': 'due_date'}),
+    ('audit: newest first', views.AuditLogViewSet, {}),
+    ('audit: action', views.AuditLogViewSet, {'action': AuditLog.AuditAction.UPDATE}),
+    ('audit: object type', views.AuditLogViewSet, {'object_type': 'student'}),
+]
+
+# StudentViewSet actions whose query count and peak memory are reported (see get_queryset).
+STUDENT_ACTIONS = ['list', 'get_all', 'retrieve']
+
+INDEXED_MODELS = [Student, Transaction, Task, GovernmentFiling, AuditLog]
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large synthetic dataset inside a transaction, then reports EXPLAIN plans and timings for "
+        "each list endpoint's first page with and without the model indexes, plus the query count and peak "
+        "memory of each StudentViewSet read action. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--transactions', type=int, default=100000)
+        parser.add_argument('--audit-logs', type=int, default=100000)
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--filings', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per query; the median is reported.")
+        parser.add_argument('--no-plans', action='store_true', help="Only print timings.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        try:
+            with transaction.atomic():
+                self.seed()
+                self.measure_student_actions()
+                with_indexes = self.measure()
+                self.drop_indexes()
+                without_indexes = self.measure()
+                self.report(without_indexes, with_indexes)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Benchmark data rolled back.")
+
+    def seed(self):
+        options, rng, today = self.options, random.Random(42), date.today()
+        started = time.perf_counter()
+        Student.objects.bulk_create([
+            Student(
+                student_id=f'BENCH-{i:07d}', first_name=f'First{rng.randrange(5000):04d}', last_name=f'Last{i:07d}',
+                date_of_birth=today - timedelta(days=rng.randrange(2000, 7000)),
+                eep_enroll_date=today - timedelta(days=rng.randrange(0, 3650)),
+                gender=rng.choice(Gender.values), student_status=rng.choice(StudentStatus.values),
+                sponsorship_status=rng.choice(SponsorshipStatus.values),
+            ) for i in range(options['students'])
+        ], batch_size=1000)
+        categories = ['School Fees', 'Donation', 'Supplies', 'Transport', 'Salaries', 'Food']
+        Transaction.objects.bulk_create([
+            Transaction(
+                date=today - timedelta(days=rng.randrange(0, 3650)), description=f'Benchmark {i}',
+                amount=rng.randrange(1, 500), type=rng.choice(Transaction.TransactionType.values),
+                category=rng.choice(categories),
+            ) for i in range(options['transactions'])
+        ], batch_size=1000)
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}', due_date=today + timedelta(days=rng.randrange(-365, 365)),
+                priority=rng.choice(Task.TaskPriority.values), status=rng.choice(Task.TaskStatus.values),
+            ) for i in range(options['tasks'])
+        ], batch_size=1000)
+        GovernmentFiling.objects.bulk_create([
+            GovernmentFiling(
+                document_name=f'Filing {i}', authority='Ministry', due_date=today + timedelta(days=rng.randrange(-720, 365)),
+                status=rng.choice(GovernmentFiling.FilingStatus.values),
+            ) for i in range(options['filings'])
+        ], batch_size=1000)
+        content_types = [ContentType.objects.get_for_model(model) for model in (Student, Transaction, Task)]
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                action=rng.choice(AuditLog.AuditAction.values), content_type=rng.choice(content_types),
+                object_id=str(i), object_repr=f'Object {i}',
+            ) for i in range(options['audit_logs'])
+        ], batch_size=1000)
+        self.analyze()
+        self.stdout.write(f"Seeded data in {time.perf_counter() - started:.1f}s.")
+
+    def analyze(self):
+        # Refresh planner statistics where the backend has a bare ANALYZE.
+        if connection.vendor in ('postgresql', 'sqlite'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def drop_indexes(self):
+        indexes = [(model, index) for model in INDEXED_MODELS for index in model._meta.indexes]
+        if connection.vendor == 'sqlite':
+            # SQLite can't open a schema editor inside the benchmark's transaction; its DROP INDEX needs no table.
+            with connection.cursor() as cursor:
+                for _, index in indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+        else:
+            with connection.schema_editor(atomic=False) as schema_editor:
+                for model, index in indexes:
+                    schema_editor.remove_index(model, index)
+        self.analyze()
+
+    def list_queryset(self, viewset_class, params):
+        request = Request(APIRequestFactory().get('/', params))
+        view = viewset_class(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+        return view, view.filter_queryset(view.get_queryset())
+
+    def measure(self):
+        results = {}
+        for label, viewset_class, params in CASES:
+            view, queryset = self.list_queryset(viewset_class, params)
+            page_size = view.paginator.page_size if view.paginator else 15
+            page = queryset[:page_size]
+            timings = []
+            for _ in range(self.options['repeat']):
+                started = time.perf_counter()
+                # Same two queries the paginator issues; .all() clones so nothing is served from a result cache.
+                queryset.all().count()
+                list(page.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = {'ms': statistics.median(timings), 'plan': page.explain()}
+        return results
+
+    def measure_student_actions(self):
+        user = User(username='benchmark', is_superuser=True)
+        student_id = Student.objects.values_list('pk', flat=True).first()
+        self.stdout.write(f"\n{'student action':<32}{'queries':>10}{'peak memory':>16}")
+        for action in STUDENT_ACTIONS:
+            request = APIRequestFactory().get('/')
+            force_authenticate(request, user=user)
+            view = views.StudentViewSet.as_view({'get': action})
+            kwargs = {'pk': student_id} if action == 'retrieve' else {}
+            tracemalloc.start()
+            try:
+                # The paginator builds absolute links from the factory's 'testserver' host.
+                with override_settings(ALLOWED_HOSTS=['testserver']), CaptureQueriesContext(connection) as queries:
+                    view(request, **kwargs).render()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.stdout.write(f"{action:<32}{len(queries):>10}{peak / 1024:>13.1f} KiB")
+
+    def report(self, before, after):
+        self.stdout.write(f"\n{'endpoint':<32}{'no indexes':>14}{'indexed':>12}{'speedup':>10}")
+        for label, _, _ in CASES:
+            old, new = before[label]['ms'], after[label]['ms']
+            speedup = old / new if new else float('inf')
+            self.stdout.write(f"{label:<32}{old:>11.2f} ms{new:>9.2f} ms{speedup:>9.1f}x")
+        if self.options['no_plans']:
+            return
+        for label, _, _ in CASES:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+            self.stdout.write("  without indexes:")
+            self.stdout.write('    ' + before[label]['plan'].replace('\n', '\n    '))
+            self.stdout.write("  with indexes:")
+            self.stdout.write('    ' + after[label]['plan'].replace('\n', '\n    '))
@@ -0,0 +1,11 @@
+# backend/core/management/commands/rebuild_dashboard_rollup.py
+
+from django.core.management.base import BaseCommand
+from core.dashboard import rebuild_monthly_rollup
+
+class Command(BaseCommand):
+    help = "Recomputes the monthly income/expense rollup used by the dashboard from the transaction ledger."
+
+    def handle(self, *args, **options):
+        buckets = rebuild_monthly_rollup()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} monthly rollup buckets."))
@@ -0,0 +1,18 @@
+# backend/core/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core import search
+
+class Command(BaseCommand):
+    help = "Rebuilds the search token index from every student, sponsor and transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = search.rebuild_index(batch_size=options['batch_size'])
+        for kind, count in counts.items():
+            self.stdout.write(f"{kind}: {count} documents")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,19 @@
+# backend/core/management/commands/reconcile_sponsorship_status.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.sponsorships import recompute_sponsorship_status
+
+class Command(BaseCommand):
+    help = "Recomputes every student's sponsorship_status/student_status from their active sponsorships."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report how many students are out of date without changing them.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = recompute_sponsorship_status()
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        verb = "would be updated" if options['dry_run'] else "updated"
+        self.stdout.write(self.style.SUCCESS(f"{updated} students {verb}."))
@@ -0,0 +1,18 @@
+# backend/core/management/commands/send_queued_mail.py
+
+from django.core.management.base import BaseCommand
+from core import mailer
+
+class Command(BaseCommand):
+    help = (
+        "Delivers due messages from the email outbox. The web processes send in the background on their own; "
+        "run this from cron to pick up retries and messages left behind by a restarted process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        recovered = mailer.recover_stuck()
+        sent, failed = mailer.deliver_pending(options['batch_size'])
+        self.stdout.write(f"Requeued {recovered} stuck, sent {sent}, failed {failed}.")
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:36
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollup(apps, schema_editor):
+    Transaction = apps.get_model('core', 'Transaction')
+    MonthlyTransactionRollup = apps.get_model('core', 'MonthlyTransactionRollup')
+    rows = (Transaction.objects.annotate(month=TruncMonth('date'))
+            .values('month', 'type')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by())
+    MonthlyTransactionRollup.objects.bulk_create(
+        [MonthlyTransactionRollup(month=r['month'], type=r['type'], total=r['total'] or 0, count=r['count']) for r in rows],
+        batch_size=500,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_remove_student_has_sponsorship_contract_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyTransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('type', models.CharField(choices=[('Income', 'Income'), ('Expense', 'Expense')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['month', 'type'],
+                'unique_together': {('month', 'type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:43
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction, DatabaseError
+
+
+def create_trigram_index(apps, schema_editor):
+    # PostgreSQL only: typo-tolerant search uses pg_trgm when it can be enabled; other
+    # databases (and servers where the extension is not permitted) use the in-process index.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                'CREATE INDEX IF NOT EXISTS core_searchtoken_token_trgm '
+                'ON core_searchtoken USING gin (token gin_trgm_ops)'
+            )
+    except DatabaseError:
+        pass
+
+
+def build_search_index(apps, schema_editor):
+    # Same routine as the rebuild_search_index command, over the historical models.
+    from core import search
+    search.rebuild_index(apps=apps)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS core_searchtoken_token_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_list_endpoint_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('student', 'Student'), ('sponsor', 'Sponsor'), ('transaction', 'Transaction')], max_length=20)),
+                ('object_id', models.CharField(max_length=100)),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('weight', models.FloatField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='core.searchdocument')),
+            ],
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
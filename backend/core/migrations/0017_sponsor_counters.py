@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:03
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Sponsor = apps.get_model('core', 'Sponsor')
+    Sponsorship = apps.get_model('core', 'Sponsorship')
+    sponsorships = Sponsorship.objects.filter(sponsor=OuterRef('pk')).order_by().values('sponsor')
+    Sponsor.objects.update(
+        active_student_count=Coalesce(Subquery(sponsorships.filter(end_date__isnull=True).annotate(n=Count('pk')).values('n')), 0),
+        lifetime_student_count=Coalesce(Subquery(sponsorships.annotate(n=Count('pk')).values('n')), 0),
+        latest_start_date=Subquery(sponsorships.annotate(latest=Max('start_date')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_auditlogarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sponsor',
+            name='active_student_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sponsor',
+            name='latest_start_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sponsor',
+            name='lifetime_student_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
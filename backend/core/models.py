@@ -1,12 +1,16 @@
 # backend/core/models.py
 
-from django.db import models
+import uuid
+from datetime import date
+from decimal import Decimal
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
 # --- Choices Enums ---
@@ -71,6 +75,10 @@ class Sponsor(models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField(unique=True)
     sponsorship_start_date = models.DateField()
+    # Portfolio counters, kept in step with Sponsorship by core.sponsorships.
+    active_student_count = models.PositiveIntegerField(default=0)
+    lifetime_student_count = models.PositiveIntegerField(default=0)
+    latest_start_date = models.DateField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -126,6 +134,15 @@ class Student(models.Model):
     risk_level = models.IntegerField(default=3)
     transportation = models.CharField(max_length=50, choices=TransportationType.choices, default=TransportationType.WALKING)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['first_name', 'last_name'], name='student_name_idx'),
+            models.Index(fields=['student_status', 'first_name', 'last_name'], name='student_status_name_idx'),
+            models.Index(fields=['sponsorship_status', 'first_name', 'last_name'], name='student_sponsorship_name_idx'),
+            models.Index(fields=['gender'], name='student_gender_idx'),
+            models.Index(fields=['eep_enroll_date'], name='student_enroll_date_idx'),
+        ]
+
     def __str__(self): return f"{self.first_name} {self.last_name} ({self.student_id})"
 
 class Sponsorship(models.Model):
@@ -139,27 +156,16 @@ class Sponsorship(models.Model):
     class Meta:
         unique_together = ('student', 'sponsor')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the counter receiver refresh the previous sponsor too when a sponsorship is moved.
+        instance._loaded_sponsor_id = instance.__dict__.get('sponsor_id')
+        return instance
+
     def __str__(self):
         return f"{self.sponsor.name} sponsors {self.student.first_name}"
 
-@receiver([post_save, post_delete], sender=Sponsorship)
-def update_student_sponsorship_status(sender, instance, **kwargs):
-    student = instance.student
-    active_sponsorships_count = Sponsorship.objects.filter(
-        student=student, 
-        end_date__isnull=True
-    ).count()
-
-    if active_sponsorships_count > 0:
-        student.sponsorship_status = SponsorshipStatus.SPONSORED
-        if student.student_status != StudentStatus.ACTIVE:
-             student.student_status = StudentStatus.ACTIVE
-    else:
-        student.sponsorship_status = SponsorshipStatus.UNSPONSORED
-        
-    student.save(update_fields=['sponsorship_status', 'student_status'])
-
-
 class StudentDocument(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='documents', to_field='student_id')
     document_type = models.CharField(max_length=50, choices=DocumentType.choices)
@@ -225,8 +231,66 @@ class Transaction(models.Model):
     type = models.CharField(max_length=20, choices=TransactionType.choices)
     category = models.CharField(max_length=100)
     student = models.ForeignKey(Student, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions', to_field='student_id')
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='transaction_date_id_idx'),
+            models.Index(fields=['type', 'date'], name='transaction_type_date_idx'),
+            models.Index(fields=['category', 'date'], name='transaction_category_date_idx'),
+        ]
     def __str__(self): return f"{self.date} - {self.description} (${self.amount})"
 
+class MonthlyTransactionRollup(models.Model):
+    """Materialized per-month income/expense totals, kept in sync with Transaction by signals."""
+    month = models.DateField()
+    type = models.CharField(max_length=20, choices=Transaction.TransactionType.choices)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('month', 'type')
+        ordering = ['month', 'type']
+
+    def __str__(self): return f"{self.month:%b %Y} {self.type}: {self.total}"
+
+def _rollup_month(value):
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.replace(day=1)
+
+def apply_transaction_rollup_delta(txn_date, txn_type, amount, count):
+    """Adds `amount`/`count` to the rollup bucket of the month containing `txn_date`."""
+    month = _rollup_month(txn_date)
+    amount = Decimal(str(amount))
+    bucket = MonthlyTransactionRollup.objects.filter(month=month, type=txn_type)
+    if bucket.update(total=F('total') + amount, count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyTransactionRollup.objects.create(month=month, type=txn_type, total=amount, count=count)
+    except IntegrityError:
+        # Another request created the bucket between our UPDATE and INSERT.
+        bucket.update(total=F('total') + amount, count=F('count') + count)
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction_values(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = Transaction.objects.filter(pk=instance.pk).values_list('date', 'type', 'amount').first()
+
+@receiver(post_save, sender=Transaction)
+def update_transaction_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        old_date, old_type, old_amount = previous
+        apply_transaction_rollup_delta(old_date, old_type, -old_amount, -1)
+    apply_transaction_rollup_delta(instance.date, instance.type, instance.amount, 1)
+
+@receiver(post_delete, sender=Transaction)
+def update_transaction_rollup_on_delete(sender, instance, **kwargs):
+    apply_transaction_rollup_delta(instance.date, instance.type, -Decimal(str(instance.amount)), -1)
+
 class GovernmentFiling(models.Model):
     class FilingStatus(models.TextChoices):
         PENDING = 'Pending', 'Pending'
@@ -237,6 +301,11 @@ class GovernmentFiling(models.Model):
     submission_date = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=FilingStatus.choices, default=FilingStatus.PENDING)
     attached_file = models.FileField(upload_to='filings/', null=True, blank=True)
+    class Meta:
+        indexes = [
+            models.Index(fields=['due_date'], name='filing_due_date_idx'),
+            models.Index(fields=['status', 'due_date'], name='filing_status_due_date_idx'),
+        ]
     def __str__(self): return f"{self.document_name} - Due: {self.due_date}"
 
 class Task(models.Model):
@@ -253,6 +322,12 @@ class Task(models.Model):
     due_date = models.DateField()
     priority = models.CharField(max_length=20, choices=TaskPriority.choices, default=TaskPriority.MEDIUM)
     status = models.CharField(max_length=20, choices=TaskStatus.choices, default=TaskStatus.TO_DO)
+    class Meta:
+        indexes = [
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_date_idx'),
+            models.Index(fields=['priority', 'due_date'], name='task_priority_due_date_idx'),
+        ]
     def __str__(self): return self.title
 
 class AuditLog(models.Model):
@@ -275,10 +350,104 @@ class AuditLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='auditlog_timestamp_id_idx'),
+            models.Index(fields=['action', 'timestamp'], name='auditlog_action_timestamp_idx'),
+            models.Index(fields=['content_type', 'timestamp'], name='auditlog_ctype_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f'{self.action} on {self.object_repr} by {self.user_identifier} at {self.timestamp}'
     
+class AuditLogArchive(models.Model):
+    """A gzip NDJSON file of AuditLog rows moved out of the live table by core.audit_archive."""
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    file_name = models.CharField(max_length=255, unique=True)
+    row_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-start']
+        indexes = [models.Index(fields=['start', 'end'], name='auditarchive_range_idx')]
+
+    def __str__(self): return f"{self.file_name} ({self.row_count} rows, {self.start:%Y-%m-%d} to {self.end:%Y-%m-%d})"
+
+class AIJob(models.Model):
+    """An AI assistant request run by the background worker pool; clients poll it by id."""
+    class Kind(models.TextChoices):
+        ASSISTANT_QUERY = 'assistant_query', 'Assistant Query'
+        STUDENT_FILTERS = 'student_filters', 'Student Filters'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ai_jobs')
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self): return f"{self.kind} ({self.status})"
+
+class OutboundEmail(models.Model):
+    """Outbox row for an email; core.mailer delivers due rows in the background with retries."""
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        SENDING = 'sending', 'Sending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set by each sender's claim so it reads back only the rows it won.
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx')]
+
+    def __str__(self): return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+class SearchDocument(models.Model):
+    """One searchable record (student, sponsor or transaction); its normalized tokens live in SearchToken."""
+    class Kind(models.TextChoices):
+        STUDENT = 'student', 'Student'
+        SPONSOR = 'sponsor', 'Sponsor'
+        TRANSACTION = 'transaction', 'Transaction'
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.CharField(max_length=100)
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self): return f"{self.kind}: {self.title}"
+
+class SearchToken(models.Model):
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='tokens')
+    token = models.CharField(max_length=64, db_index=True)
+    weight = models.FloatField(default=1)
+
+    def __str__(self): return self.token
+
 class RoleProfile(models.Model):
     group = models.OneToOneField(Group, on_delete=models.CASCADE, related_name='roleprofile')
     permissions = models.JSONField(default=dict)
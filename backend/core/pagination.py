@@ -1,8 +1,131 @@
 # core/pagination.py
 
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 15
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+def estimated_count(queryset):
+    """The planner's row estimate on PostgreSQL (no table scan); an exact count elsewhere."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str): plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique ordering such as ('-timestamp', '-id'). Each page is
+    a range query starting at the previous page's last row, so page 1000 costs the same
+    as page 1. No count is run unless asked for with ?count=exact or ?count=estimate.
+    """
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = 'page_size'
+    max_page_size = StandardResultsSetPagination.max_page_size
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-id',)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        values = [getattr(row, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'v': [v.isoformat() if hasattr(v, 'isoformat') else v for v in values], 'r': reverse})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values = [
+                queryset.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['v'], strict=True)
+            ]
+            return values, bool(payload['r'])
+        except Exception:
+            raise NotFound('Invalid cursor.')
+
+    def _after(self, values, reverse):
+        """Rows strictly after `values` in the ordering (strictly before when `reverse`)."""
+        condition, equal = Q(), Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'gt' if field.startswith('-') == reverse else 'lt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.request, self.page_size = request, self.get_page_size(request)
+        self.count = None
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact': self.count = queryset.count()
+        elif count_mode == 'estimate': self.count = estimated_count(queryset)
+
+        values, reverse = None, False
+        if cursor := request.query_params.get(self.cursor_query_param):
+            values, reverse = self.decode_cursor(queryset, cursor)
+            queryset = queryset.filter(self._after(values, reverse))
+        order = [field.lstrip('-') if field.startswith('-') else f'-{field}' for field in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*order)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse: rows.reverse()
+
+        # Walking backwards, "more" lies before the page; a cursor always means rows exist on the side it came from.
+        self.has_next = bool(rows) and (values is not None if reverse else has_more)
+        self.has_previous = bool(rows) and (has_more if reverse else values is not None)
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def _link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def get_next_link(self):
+        return self._link(self.last, False) if self.has_next else None
+
+    def get_previous_link(self):
+        return self._link(self.first, True) if self.has_previous else None
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count, 'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data,
+        })
+
+class CursorOrPageNumberPagination(StandardResultsSetPagination):
+    """
+    Page-number pagination by default; keyset pagination on the view's `keyset_ordering`
+    when the request has ?pagination=cursor or a ?cursor= token. Cursor mode ignores ?ordering.
+    """
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == 'cursor' or KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
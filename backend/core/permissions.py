@@ -1,6 +1,84 @@
 # backend/core/permissions.py
 
+import time
+from django.conf import settings
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
 from rest_framework import permissions
+from .models import RoleProfile
+
+ROLE_PERMISSIONS_CACHE_PREFIX = 'role_permissions:'
+AUTH_REVISION_CACHE_PREFIX = 'auth_revision:'
+
+def _role_permissions_key(user_id):
+    return f'{ROLE_PERMISSIONS_CACHE_PREFIX}{user_id}'
+
+def _auth_revision_key(user_id):
+    return f'{AUTH_REVISION_CACHE_PREFIX}{user_id}'
+
+def get_auth_revision(user_id):
+    """
+    Counter bumped whenever the user's role, permissions or account flags change (see
+    core.tokens), or None if the cache no longer holds it.
+    """
+    return cache.get(_auth_revision_key(user_id))
+
+def _new_revision():
+    # A counter recreated after eviction starts above every value it could have reached before.
+    return time.time_ns() // 1000
+
+def current_auth_revision(user_id):
+    """The revision to embed in a new access token, starting the counter if needed."""
+    key = _auth_revision_key(user_id)
+    cache.add(key, _new_revision(), None)
+    return cache.get(key)
+
+def bump_auth_revision(user_ids):
+    for user_id in user_ids:
+        key = _auth_revision_key(user_id)
+        cache.add(key, _new_revision(), None)
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted between add and incr
+            cache.set(key, _new_revision(), None)
+
+def get_role_permissions(user):
+    """
+    Returns the module permission map of the user's role ({} if the user has no role).
+    Users authenticated from access-token claims carry their map; otherwise resolved
+    maps are cached per user id, so steady-state requests cost no queries.
+    """
+    claimed = getattr(user, 'claimed_permissions', None)
+    if claimed is not None:
+        return claimed
+    key = _role_permissions_key(user.pk)
+    permissions_data = cache.get(key)
+    if permissions_data is None:
+        group = user.groups.select_related('roleprofile').first()
+        try:
+            permissions_data = group.roleprofile.permissions if group else {}
+        except RoleProfile.DoesNotExist:
+            permissions_data = {}
+        cache.set(key, permissions_data, settings.ROLE_PERMISSIONS_CACHE_TIMEOUT)
+    return permissions_data
+
+def invalidate_role_permissions(user_ids):
+    """
+    Drops the cached maps once the change commits; dropping them earlier would let a
+    concurrent request re-cache the old permissions before the new rows are visible.
+    """
+    user_ids = list(user_ids)
+    def invalidate():
+        cache.delete_many([_role_permissions_key(user_id) for user_id in user_ids])
+        # Access tokens issued before this point carry the old permissions; make them refresh.
+        bump_auth_revision(user_ids)
+    transaction.on_commit(invalidate)
+
+def _group_member_ids(group_id):
+    return list(User.objects.filter(groups=group_id).values_list('id', flat=True))
 
 class HasModulePermission(permissions.BasePermission):
     """
@@ -32,16 +110,37 @@ class HasModulePermission(permissions.BasePermission):
         }
         required_action = action_map.get(request.method, 'read')
 
-        # Get the user's group (role)
-        group = user.groups.first()
-        if not group:
-            return False # User has no role assigned
+        # Users without a role (or whose role has no RoleProfile) resolve to an empty map.
+        module_permissions = get_role_permissions(user).get(module_name, {})
+        return module_permissions.get(required_action, False)
 
-        # Retrieve the permissions from the RoleProfile linked to the group
-        try:
-            permissions_data = group.roleprofile.permissions
-            module_permissions = permissions_data.get(module_name, {})
-            return module_permissions.get(required_action, False)
-        except AttributeError:
-            # This happens if the RoleProfile doesn't exist for the group
-            return False
\ No newline at end of file
+# --- Cache invalidation ---
+
+@receiver([post_save, post_delete], sender=RoleProfile)
+def invalidate_role_profile_members(sender, instance, **kwargs):
+    invalidate_role_permissions(_group_member_ids(instance.group_id))
+
+@receiver(pre_delete, sender=Group)
+def invalidate_deleted_group_members(sender, instance, **kwargs):
+    invalidate_role_permissions(_group_member_ids(instance.pk))
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_role_permissions([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_role_permissions(_group_member_ids(instance.pk))
+    else:
+        invalidate_role_permissions(pk_set)
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_role_permissions([instance.pk])
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login; anything else may have changed is_active or is_superuser.
+    if not created and set(update_fields or ()) != {'last_login'}:
+        bump_auth_revision([instance.pk])
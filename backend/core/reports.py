@@ -0,0 +1,156 @@
+# backend/core/reports.py
+
+import csv
+import os
+import time
+import uuid
+from django.conf import settings
+from django.core import signing
+from django.db.models import Exists, OuterRef, Sum, Q
+from django.urls import reverse
+from .models import Student, Sponsor, Sponsorship, Transaction
+
+REPORT_FORMATS = ('csv', 'xlsx')
+REPORT_CHUNK_SIZE = 2000
+REPORT_SIGNING_SALT = 'core.reports.download'
+
+ROSTER_COLUMNS = [
+    ('studentId', 'Student ID'), ('firstName', 'First Name'), ('lastName', 'Last Name'),
+    ('dateOfBirth', 'Date of Birth'), ('gender', 'Gender'), ('studentStatus', 'Status'),
+    ('sponsorshipStatus', 'Sponsorship'), ('sponsorName', 'Sponsor'), ('school', 'School'), ('currentGrade', 'Grade'),
+]
+FINANCIAL_COLUMNS = [
+    ('date', 'Date'), ('description', 'Description'), ('category', 'Category'), ('type', 'Type'), ('amount', 'Amount'),
+]
+
+class ReportError(Exception):
+    """Raised with a user-facing message when a report cannot be built."""
+
+# --- Row sources: two streamed queries each, whatever the size of the report ---
+
+def roster_queryset(student_status=None, sponsorship_status=None, sponsor_name=None):
+    students = Student.objects.all()
+    if student_status: students = students.filter(student_status=student_status)
+    if sponsorship_status: students = students.filter(sponsorship_status=sponsorship_status)
+    if sponsor_name:
+        if not Sponsor.objects.filter(name__iexact=sponsor_name).exists():
+            raise ReportError(f"Sponsor named '{sponsor_name}' not found.")
+        # A sponsor with no active sponsorships gets an empty roster, not an error.
+        active = Sponsorship.objects.filter(end_date__isnull=True, sponsor__name__iexact=sponsor_name)
+        students = students.filter(Exists(active.filter(student=OuterRef('pk'))))
+    return students
+
+def roster_rows(students):
+    """
+    Yields one dict per student with the names of their active sponsors. Students and
+    active sponsorships are both read in student_id order and merged, so memory stays
+    flat and the whole roster costs two queries.
+    """
+    sponsor_names = (
+        Sponsorship.objects.filter(end_date__isnull=True, student__in=students.values('pk'))
+        .order_by('student_id', 'sponsor__name').values_list('student_id', 'sponsor__name')
+        .iterator(chunk_size=REPORT_CHUNK_SIZE)
+    )
+    pending = next(sponsor_names, None)
+    for s in students.order_by('student_id').iterator(chunk_size=REPORT_CHUNK_SIZE):
+        names = []
+        # Both streams use the same ORDER BY, so sponsorship student ids are a subsequence
+        # of the student ids; comparing for equality is enough (no collation assumptions).
+        while pending is not None and pending[0] == s.student_id:
+            names.append(pending[1])
+            pending = next(sponsor_names, None)
+        yield {
+            'studentId': s.student_id, 'firstName': s.first_name, 'lastName': s.last_name,
+            'dateOfBirth': s.date_of_birth.isoformat(), 'gender': s.gender, 'studentStatus': s.student_status,
+            'sponsorshipStatus': s.sponsorship_status, 'sponsorName': ', '.join(names) or 'N/A',
+            'school': s.school, 'currentGrade': s.current_grade,
+        }
+
+def financial_rows(transactions):
+    rows = transactions.order_by('date', 'id').values_list('date', 'description', 'category', 'type', 'amount')
+    for txn_date, description, category, txn_type, amount in rows.iterator(chunk_size=REPORT_CHUNK_SIZE):
+        yield {'date': txn_date.isoformat(), 'description': description, 'category': category, 'type': txn_type, 'amount': amount}
+
+def financial_totals(transactions):
+    totals = transactions.aggregate(
+        income=Sum('amount', filter=Q(type=Transaction.TransactionType.INCOME)),
+        expense=Sum('amount', filter=Q(type=Transaction.TransactionType.EXPENSE)),
+    )
+    income, expense = totals['income'] or 0, totals['expense'] or 0
+    return {'income': income, 'expense': expense, 'net': income - expense}
+
+def financial_summary(totals, start_date, end_date):
+    """The lines written above the ledger in financial CSV/XLSX files."""
+    return [
+        'AI Generated Financial Summary', f'Date Range: {start_date} to {end_date}',
+        f"Total Income: ${totals['income']:.2f}", f"Total Expenses: ${totals['expense']:.2f}",
+        f"Net Balance: ${totals['net']:.2f}",
+    ]
+
+# --- Writers ---
+
+def _write_csv(path, columns, rows, summary):
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if summary: writer.writerows([[line] for line in summary] + [[]])
+        writer.writerow([label for _, label in columns])
+        for row in rows:
+            writer.writerow([row[key] for key, _ in columns])
+            count += 1
+    return count
+
+def _write_xlsx(path, columns, rows, summary):
+    from openpyxl import Workbook
+    # write_only streams rows to disk instead of keeping the sheet in memory.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Report')
+    for line in (summary + [''] if summary else []): sheet.append([line])
+    sheet.append([label for _, label in columns])
+    count = 0
+    for row in rows:
+        sheet.append([row[key] for key, _ in columns])
+        count += 1
+    workbook.save(path)
+    return count
+
+_WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx}
+
+def _purge_expired_reports():
+    cutoff = time.time() - settings.REPORT_DOWNLOAD_TTL
+    for entry in os.scandir(settings.REPORTS_ROOT):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            try: os.remove(entry.path)
+            except FileNotFoundError: pass
+
+def write_report(columns, rows, file_format, filename, module, summary=None):
+    """
+    Streams `rows` into a temporary report file, below the `summary` lines if given, and
+    returns a download handle: {'downloadUrl', 'filename', 'rowCount'}. The URL carries a
+    signed token that expires after REPORT_DOWNLOAD_TTL seconds and names the permission
+    module (e.g. 'students') whose read access the downloader needs.
+    """
+    if file_format not in _WRITERS:
+        raise ReportError(f"Unsupported format '{file_format}'. Supported: {', '.join(REPORT_FORMATS)}.")
+    os.makedirs(settings.REPORTS_ROOT, exist_ok=True)
+    _purge_expired_reports()
+    name = f'{uuid.uuid4().hex}.{file_format}'
+    path = os.path.join(settings.REPORTS_ROOT, name)
+    partial = f'{path}.partial'
+    try:
+        row_count = _WRITERS[file_format](partial, columns, rows, summary)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial): os.remove(partial)
+    download_name = f'{filename}.{file_format}'
+    token = signing.dumps({'file': name, 'name': download_name, 'module': module}, salt=REPORT_SIGNING_SALT)
+    return {'downloadUrl': reverse('report-download', args=[token]), 'filename': download_name, 'rowCount': row_count}
+
+def resolve_download(token):
+    """Returns (path, download filename, permission module) for a valid, unexpired token, else None."""
+    try:
+        data = signing.loads(token, salt=REPORT_SIGNING_SALT, max_age=settings.REPORT_DOWNLOAD_TTL)
+    except signing.BadSignature:
+        return None
+    path = os.path.join(settings.REPORTS_ROOT, os.path.basename(data['file']))
+    return (path, data['name'], data.get('module')) if os.path.isfile(path) else None
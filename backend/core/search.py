@@ -0,0 +1,265 @@
+# backend/core/search.py
+
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SearchDocument, SearchToken, Student, Sponsor, Transaction
+
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TERMS = 8
+MAX_TOKEN_MATCHES = 5000
+FUZZY_MIN_LENGTH = 3
+FUZZY_MIN_SIMILARITY = 0.75
+FUZZY_MAX_EXPANSIONS = 20
+PREFIX_SCORE = 0.8
+FUZZY_SCORE = 0.6
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def normalize(text):
+    """Lowercases and strips accents so 'José' and 'jose' index to the same token."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in _TOKEN_RE.findall(normalize(text))]
+
+# --- Document builders: kind -> (model, builder returning (title, subtitle, [(text, weight), ...])) ---
+
+def _student_document(student):
+    name = f"{student.first_name} {student.last_name}"
+    fields = [(student.first_name, 3), (student.last_name, 3), (student.student_id, 3),
+              # 'EEP-001' is also indexed as 'eep001' so it matches however the id is typed.
+              (''.join(tokenize(student.student_id)), 3), (student.school, 1)]
+    return name, student.student_id, fields
+
+def _sponsor_document(sponsor):
+    return sponsor.name, sponsor.email, [(sponsor.name, 3), (sponsor.email, 2)]
+
+def _transaction_document(txn):
+    subtitle = f"{txn.date} · {txn.type} · {txn.amount}"
+    return txn.description, subtitle, [(txn.description, 2), (txn.category, 1), (txn.location, 1)]
+
+DOCUMENT_BUILDERS = {
+    SearchDocument.Kind.STUDENT: (Student, _student_document),
+    SearchDocument.Kind.SPONSOR: (Sponsor, _sponsor_document),
+    SearchDocument.Kind.TRANSACTION: (Transaction, _transaction_document),
+}
+KIND_FOR_MODEL = {model: kind for kind, (model, _) in DOCUMENT_BUILDERS.items()}
+
+# --- Index maintenance ---
+
+def remove_objects(kind, object_ids, apps=global_apps):
+    # Tokens go with their documents through the cascade, in one extra DELETE.
+    apps.get_model('core', 'SearchDocument').objects.filter(kind=kind, object_id__in=[str(object_id) for object_id in object_ids]).delete()
+
+def index_objects(kind, instances, batch_size=1000, apps=global_apps):
+    """(Re)indexes `instances` of one kind with a fixed number of queries per batch."""
+    _, build = DOCUMENT_BUILDERS[kind]
+    document_model, token_model = apps.get_model('core', 'SearchDocument'), apps.get_model('core', 'SearchToken')
+    instances = list(instances)
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        remove_objects(kind, [instance.pk for instance in batch], apps)
+        documents, token_sets = [], []
+        for instance in batch:
+            title, subtitle, fields = build(instance)
+            documents.append(document_model(kind=kind, object_id=str(instance.pk), title=title[:255], subtitle=subtitle[:255]))
+            weights = {}
+            for text, weight in fields:
+                for token in tokenize(text):
+                    weights[token] = max(weights.get(token, 0), weight)
+            token_sets.append(weights)
+        document_model.objects.bulk_create(documents)
+        token_model.objects.bulk_create([
+            token_model(document=document, token=token, weight=weight)
+            for document, weights in zip(documents, token_sets) for token, weight in weights.items()
+        ], batch_size=batch_size)
+
+def rebuild_index(batch_size=1000, apps=global_apps):
+    """
+    Drops and rebuilds the whole index; returns {kind: documents indexed}. Migrations
+    pass their historical `apps`.
+    """
+    apps.get_model('core', 'SearchToken').objects.all().delete()
+    apps.get_model('core', 'SearchDocument').objects.all().delete()
+    counts = {}
+    for kind, (model, _) in DOCUMENT_BUILDERS.items():
+        queryset = apps.get_model('core', model.__name__).objects.order_by('pk')
+        counts[kind] = queryset.count()
+        batch = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) == batch_size:
+                index_objects(kind, batch, batch_size, apps)
+                batch = []
+        index_objects(kind, batch, batch_size, apps)
+    _vocabulary.invalidate()
+    return counts
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Sponsor)
+@receiver(post_save, sender=Transaction)
+def index_saved_object(sender, instance, raw=False, **kwargs):
+    if not raw: index_objects(KIND_FOR_MODEL[sender], [instance])
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Sponsor)
+@receiver(post_delete, sender=Transaction)
+def remove_deleted_object(sender, instance, **kwargs):
+    remove_objects(KIND_FOR_MODEL[sender], [instance.pk])
+
+# --- Typo tolerance ---
+
+def _trigrams(token):
+    padded = f' {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _similar(term, token):
+    return SequenceMatcher(None, term, token).ratio()
+
+class VocabularyIndex:
+    """
+    In-process trigram index over the distinct indexed tokens, used to expand a
+    misspelled term into the tokens it probably meant. It is rebuilt lazily at most
+    every SEARCH_VOCABULARY_TTL seconds; tokens added in between are still found by
+    exact and prefix matching, just not by fuzzy matching.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trigrams = None
+        self._built_at = 0
+
+    def invalidate(self):
+        self._trigrams = None
+
+    def _load(self):
+        trigrams = defaultdict(set)
+        tokens = SearchToken.objects.exclude(token__regex=r'^[0-9]+$').values_list('token', flat=True).distinct()
+        for token in tokens.iterator(chunk_size=5000):
+            for trigram in _trigrams(token):
+                trigrams[trigram].add(token)
+        return trigrams
+
+    def _index(self):
+        ttl = getattr(settings, 'SEARCH_VOCABULARY_TTL', 300)
+        with self._lock:
+            if self._trigrams is None or time.monotonic() - self._built_at > ttl:
+                self._trigrams, self._built_at = self._load(), time.monotonic()
+            return self._trigrams
+
+    def expand(self, term):
+        index = self._index()
+        candidates = set()
+        for trigram in _trigrams(term):
+            candidates.update(index.get(trigram, ()))
+        scored = [
+            (token, similarity) for token in candidates
+            if abs(len(token) - len(term)) <= 2 and token != term
+            and (similarity := _similar(term, token)) >= FUZZY_MIN_SIMILARITY
+        ]
+        return sorted(scored, key=lambda item: -item[1])[:FUZZY_MAX_EXPANSIONS]
+
+_vocabulary = VocabularyIndex()
+_pg_trgm_available = None
+
+def _use_pg_trgm():
+    global _pg_trgm_available
+    if connection.vendor != 'postgresql':
+        return False
+    if _pg_trgm_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _pg_trgm_available = cursor.fetchone() is not None
+    return _pg_trgm_available
+
+def fuzzy_expansions(term):
+    """Returns [(token, similarity), ...] of indexed tokens that look like misspellings of `term`."""
+    if len(term) < FUZZY_MIN_LENGTH:
+        return []
+    if _use_pg_trgm():
+        from django.contrib.postgres.search import TrigramSimilarity
+        rows = (SearchToken.objects.filter(token__trigram_similar=term)
+                .annotate(similarity=TrigramSimilarity('token', term))
+                .order_by('-similarity').values_list('token', flat=True).distinct()[:FUZZY_MAX_EXPANSIONS * 5])
+        scored = [(token, _similar(term, token)) for token in rows if token != term]
+        return sorted([item for item in scored if item[1] >= FUZZY_MIN_SIMILARITY], key=lambda item: -item[1])[:FUZZY_MAX_EXPANSIONS]
+    return _vocabulary.expand(term)
+
+# --- Querying ---
+
+def _term_score(term, token, expansions):
+    if token == term: return 1.0
+    if token.startswith(term): return PREFIX_SCORE
+    return FUZZY_SCORE * expansions.get(token, 0)
+
+def _term_condition(term, expansions):
+    condition = Q(token__in=[term, *expansions])
+    # A range scan rather than LIKE so the token index is used on every backend.
+    if len(term) >= 2: condition |= Q(token__gte=term, token__lt=term + '\uffff')
+    return condition
+
+def search(query, kinds=None, limit=20):
+    """
+    Ranks documents against `query`. Each query term matches tokens exactly, by prefix
+    (terms of 2+ characters) or, for longer terms, through fuzzy expansions.
+
+    Candidates are the documents matching the rarest term that matches anything, so a
+    common term (e.g. 'eep' in every student id) never crowds the useful rows out.
+    Documents matching more terms rank first, then by weighted, IDF-scaled score.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms or kinds == []:
+        return []
+    tokens = SearchToken.objects.all()
+    if kinds: tokens = tokens.filter(document__kind__in=kinds)
+
+    term_expansions, conditions, frequencies = [], [], []
+    for term in terms:
+        expansions = dict(fuzzy_expansions(term))
+        condition = _term_condition(term, expansions)
+        term_expansions.append(expansions)
+        conditions.append(condition)
+        frequencies.append(tokens.filter(condition).values('document_id').distinct().count())
+    matched = [i for i, frequency in enumerate(frequencies) if frequency]
+    if not matched:
+        return []
+    total = SearchDocument.objects.count()
+    idf = [math.log(1 + total / frequency) if frequency else 0 for frequency in frequencies]
+
+    driver = min(matched, key=lambda i: frequencies[i])
+    # Materialized: some backends (MySQL) reject a LIMITed subquery inside IN.
+    candidates = set(tokens.filter(conditions[driver]).order_by('-weight').values_list('document_id', flat=True)[:MAX_TOKEN_MATCHES])
+    any_term = Q()
+    for i in matched: any_term |= conditions[i]
+    rows = tokens.filter(any_term, document_id__in=candidates).values_list('document_id', 'token', 'weight')
+
+    best = defaultdict(lambda: [0.0] * len(terms))
+    for document_id, token, weight in rows:
+        scores = best[document_id]
+        for i, term in enumerate(terms):
+            scores[i] = max(scores[i], _term_score(term, token, term_expansions[i]) * weight * idf[i])
+
+    ranked = sorted(best.items(), key=lambda item: (-sum(1 for s in item[1] if s), -sum(item[1]), item[0]))[:limit]
+    documents = SearchDocument.objects.in_bulk([document_id for document_id, _ in ranked])
+    return [
+        {
+            'type': documents[document_id].kind,
+            'id': documents[document_id].object_id,
+            'title': documents[document_id].title,
+            'subtitle': documents[document_id].subtitle,
+            'score': round(sum(scores), 3),
+        }
+        for document_id, scores in ranked if document_id in documents
+    ]
@@ -10,7 +10,7 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 import json
 from .models import (
     Student, AcademicReport, FollowUpRecord, Transaction, GovernmentFiling, 
-    Task, AuditLog, Sponsor, RoleProfile, StudentDocument, Sponsorship
+    Task, AuditLog, Sponsor, RoleProfile, StudentDocument, Sponsorship, AIJob
 )
 
 class StudentDocumentSerializer(serializers.ModelSerializer):
@@ -45,7 +45,6 @@ class SponsorshipSerializer(serializers.ModelSerializer):
 class TransactionSerializer(serializers.ModelSerializer):
     student = serializers.PrimaryKeyRelatedField(
         queryset=Student.objects.all(), 
-        pk_field='student_id', 
         allow_null=True, 
         required=False,
     )
@@ -55,7 +54,8 @@ class TransactionSerializer(serializers.ModelSerializer):
     
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['student_id'] = instance.student.student_id if instance.student else None
+        # Read the raw FK column so serializing a ledger never loads the related Student rows.
+        representation['student_id'] = instance.student_id
         representation.pop('student', None) 
         return representation
 
@@ -77,18 +77,31 @@ class StudentListSerializer(serializers.ModelSerializer):
         ]
 
 class SponsorSerializer(serializers.ModelSerializer):
-    sponsored_student_count = serializers.IntegerField(read_only=True)
+    sponsored_student_count = serializers.IntegerField(source='active_student_count', read_only=True)
     
     class Meta:
         model = Sponsor
-        fields = ['id', 'name', 'email', 'sponsorship_start_date', 'sponsored_student_count']
+        fields = [
+            'id', 'name', 'email', 'sponsorship_start_date', 'sponsored_student_count',
+            'active_student_count', 'lifetime_student_count', 'latest_start_date',
+        ]
+        read_only_fields = ['active_student_count', 'lifetime_student_count', 'latest_start_date']
 
 class SponsorLookupSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sponsor
         fields = ['id', 'name']
 
-class StudentSerializer(serializers.ModelSerializer):
+class FieldProjectionMixin:
+    """Lets callers pass `fields=[...]` to render only a subset of the serializer's fields."""
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+class StudentSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     academic_reports = AcademicReportSerializer(many=True, read_only=True)
     follow_up_records = FollowUpRecordSerializer(many=True, read_only=True)
     documents = StudentDocumentSerializer(many=True, read_only=True)
@@ -127,6 +140,11 @@ class AuditLogSerializer(serializers.ModelSerializer):
         model = AuditLog
         fields = ['id', 'timestamp', 'user_identifier', 'action', 'content_type', 'object_id', 'object_repr', 'changes']
 
+class AIJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AIJob
+        fields = ['id', 'kind', 'status', 'result', 'error', 'created_at', 'finished_at']
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
     password2 = serializers.CharField(write_only=True, required=True, label='Confirm password')
@@ -176,10 +194,19 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'role', 'status', 'last_login', 'is_admin', 'permissions')
         read_only_fields = ('id', 'username', 'email', 'status', 'last_login', 'is_admin', 'permissions')
 
+    def _group(self, obj):
+        """The user's role group (lowest id, like groups.first()), resolved once per user; uses prefetched groups when present."""
+        if not hasattr(obj, '_role_group'):
+            if 'groups' in getattr(obj, '_prefetched_objects_cache', {}):
+                obj._role_group = min(obj.groups.all(), key=lambda group: group.pk, default=None)
+            else:
+                obj._role_group = obj.groups.select_related('roleprofile').order_by('pk').first()
+        return obj._role_group
+
     def get_role(self, obj):
         if obj.is_superuser:
             return 'Administrator'
-        group = obj.groups.first()
+        group = self._group(obj)
         return group.name if group else None
 
     def get_status(self, obj):
@@ -189,7 +216,7 @@ class UserSerializer(serializers.ModelSerializer):
         if obj.is_superuser:
             return {}
         
-        group = obj.groups.first()
+        group = self._group(obj)
         if group and hasattr(group, 'roleprofile'):
             return group.roleprofile.permissions
         return {}
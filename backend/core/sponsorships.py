@@ -0,0 +1,193 @@
+# backend/core/sponsorships.py
+
+import threading
+from contextlib import contextmanager
+from django.core.exceptions import ValidationError
+from django.db.models import Case, Count, Exists, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from . import audit
+from .caching import bump_table_version
+from .models import AuditLog, Student, Sponsor, Sponsorship, SponsorshipStatus, StudentStatus, Transaction
+
+_local = threading.local()
+
+def active_sponsors_count():
+    """A student's active sponsorships as a correlated subquery, so annotating it adds no JOIN or GROUP BY."""
+    counts = (Sponsorship.objects.filter(student=OuterRef('pk'), end_date__isnull=True)
+              .order_by().values('student').annotate(count=Count('pk')).values('count'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+def sponsored_by(sponsor_id):
+    """Filter condition for students with any sponsorship (active or ended) from `sponsor_id`."""
+    return Exists(Sponsorship.objects.filter(student=OuterRef('pk'), sponsor_id=sponsor_id))
+
+def recompute_sponsorship_status(student_ids=None):
+    """
+    Brings sponsorship_status (and student_status, which becomes Active once a student
+    has an active sponsorship) in line with the Sponsorship table for `student_ids`,
+    or for every student when None. One UPDATE, touching only rows that change;
+    returns the number of students updated.
+    """
+    has_active = Exists(Sponsorship.objects.filter(student=OuterRef('pk'), end_date__isnull=True))
+    students = Student.objects.all() if student_ids is None else Student.objects.filter(pk__in=list(student_ids))
+    stale = students.filter(
+        (has_active & ~Q(sponsorship_status=SponsorshipStatus.SPONSORED, student_status=StudentStatus.ACTIVE))
+        | (~has_active & ~Q(sponsorship_status=SponsorshipStatus.UNSPONSORED))
+    )
+    updated = stale.update(
+        sponsorship_status=Case(When(has_active, then=Value(SponsorshipStatus.SPONSORED)), default=Value(SponsorshipStatus.UNSPONSORED)),
+        student_status=Case(When(has_active, then=Value(StudentStatus.ACTIVE)), default=F('student_status')),
+    )
+    # The UPDATE bypasses Student's save signals.
+    if updated: bump_table_version(Student)
+    return updated
+
+def recompute_sponsor_counters(sponsor_ids=None):
+    """
+    Refreshes active_student_count, lifetime_student_count and latest_start_date for
+    `sponsor_ids` (every sponsor when None) from their sponsorships in one UPDATE.
+    Recounting the affected sponsors, rather than adding and subtracting, means a
+    missed signal can never leave a counter permanently off.
+    """
+    sponsorships = Sponsorship.objects.filter(sponsor=OuterRef('pk')).order_by().values('sponsor')
+    sponsors = Sponsor.objects.all() if sponsor_ids is None else Sponsor.objects.filter(pk__in=list(sponsor_ids))
+    return sponsors.update(
+        active_student_count=Coalesce(Subquery(sponsorships.filter(end_date__isnull=True).annotate(n=Count('pk')).values('n')), 0),
+        lifetime_student_count=Coalesce(Subquery(sponsorships.annotate(n=Count('pk')).values('n')), 0),
+        latest_start_date=Subquery(sponsorships.annotate(latest=Max('start_date')).values('latest')),
+    )
+
+@contextmanager
+def batched_status_updates():
+    """
+    Collects the students and sponsors touched by Sponsorship saves/deletes inside the
+    block and recomputes them once on exit, instead of once per row (e.g. cascading deletes).
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending, _local.pending_sponsors = set(), set()
+    try:
+        yield
+        pending, pending_sponsors = _local.pending, _local.pending_sponsors
+    finally:
+        _local.pending = _local.pending_sponsors = None
+    if pending: recompute_sponsorship_status(pending)
+    if pending_sponsors: recompute_sponsor_counters(pending_sponsors)
+
+@receiver([post_save, post_delete], sender=Sponsorship)
+def update_student_sponsorship_status(sender, instance, **kwargs):
+    sponsor_ids = {instance.sponsor_id, getattr(instance, '_loaded_sponsor_id', None)} - {None}
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.add(instance.student_id)
+        _local.pending_sponsors.update(sponsor_ids)
+    else:
+        recompute_sponsorship_status([instance.student_id])
+        recompute_sponsor_counters(sponsor_ids)
+    instance._loaded_sponsor_id = instance.sponsor_id
+
+def _student_key(row):
+    value = row.get('student')
+    return str(value) if isinstance(value, (str, int)) and value != '' else None
+
+def _sponsor_key(row):
+    value = row.get('sponsor')
+    return int(value) if isinstance(value, (str, int)) and str(value).isdigit() else None
+
+def _conflict(index, row, message):
+    return {'index': index, 'student': row.get('student'), 'sponsor': row.get('sponsor'), 'message': message}
+
+def assign_sponsorships(rows, user=None):
+    """
+    Creates many sponsorships at once. Rows are {student, sponsor, start_date?,
+    has_sponsorship_contract?}; each is checked for unknown students/sponsors, bad dates
+    and unique_together clashes (with existing rows or earlier rows in the batch) using
+    a fixed number of queries. Valid rows are bulk-inserted, audited in one batch and
+    their students' statuses recomputed set-wise. Callers wrap this in a transaction.
+    """
+    start_date_field = Sponsorship._meta.get_field('start_date')
+    objects = [row for row in rows if isinstance(row, dict)]
+    students = Student.objects.in_bulk({key for row in objects if (key := _student_key(row))})
+    sponsors = Sponsor.objects.in_bulk({key for row in objects if (key := _sponsor_key(row))})
+    existing_pairs = set(Sponsorship.objects.filter(student__in=students, sponsor__in=sponsors).values_list('student_id', 'sponsor_id'))
+
+    to_create, conflicts, seen_pairs = [], [], set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            conflicts.append({'index': index, 'student': None, 'sponsor': None, 'message': 'Expected an object.'})
+            continue
+        student, sponsor = students.get(_student_key(row)), sponsors.get(_sponsor_key(row))
+        if student is None or sponsor is None:
+            conflicts.append(_conflict(index, row, 'Unknown student.' if student is None else 'Unknown sponsor.'))
+            continue
+        pair = (student.pk, sponsor.pk)
+        if pair in existing_pairs or pair in seen_pairs:
+            conflicts.append(_conflict(index, row, 'This sponsor is already assigned to this student.'))
+            continue
+        try:
+            start_date = start_date_field.to_python(row.get('start_date')) or timezone.localdate()
+        except ValidationError as e:
+            conflicts.append(_conflict(index, row, ' '.join(e.messages)))
+            continue
+        seen_pairs.add(pair)
+        to_create.append(Sponsorship(
+            student=student, sponsor=sponsor, start_date=start_date,
+            has_sponsorship_contract=bool(row.get('has_sponsorship_contract', False)),
+        ))
+
+    if to_create:
+        Sponsorship.objects.bulk_create(to_create)
+        for sponsorship in to_create:
+            audit.log_action(user, sponsorship, AuditLog.AuditAction.CREATE)
+        # bulk_create skips the status receiver.
+        recompute_sponsorship_status({sponsorship.student_id for sponsorship in to_create})
+        recompute_sponsor_counters({sponsorship.sponsor_id for sponsorship in to_create})
+    return to_create, conflicts
+
+def sponsor_portfolio(sponsor, start_date=None, end_date=None):
+    """
+    A sponsor's students with their contract status and the income/expense recorded
+    against each (optionally within [start_date, end_date]), plus portfolio totals.
+    Two queries however many students the sponsor has.
+    """
+    sponsorships = list(
+        Sponsorship.objects.filter(sponsor=sponsor).select_related('student')
+        .only('start_date', 'end_date', 'has_sponsorship_contract', 'student__student_id',
+              'student__first_name', 'student__last_name', 'student__student_status', 'student__sponsorship_status')
+        .order_by('student__first_name', 'student__last_name')
+    )
+    transactions = Transaction.objects.filter(student_id__in=[s.student_id for s in sponsorships])
+    if start_date: transactions = transactions.filter(date__gte=start_date)
+    if end_date: transactions = transactions.filter(date__lte=end_date)
+    totals_by_student = {
+        row['student_id']: row for row in transactions.order_by().values('student_id').annotate(
+            income=Sum('amount', filter=Q(type=Transaction.TransactionType.INCOME)),
+            expense=Sum('amount', filter=Q(type=Transaction.TransactionType.EXPENSE)),
+            count=Count('pk'),
+        )
+    } if sponsorships else {}
+
+    students, income_total, expense_total = [], 0, 0
+    for sponsorship in sponsorships:
+        student, totals = sponsorship.student, totals_by_student.get(sponsorship.student_id, {})
+        income, expense = totals.get('income') or 0, totals.get('expense') or 0
+        income_total, expense_total = income_total + income, expense_total + expense
+        students.append({
+            'studentId': student.student_id, 'firstName': student.first_name, 'lastName': student.last_name,
+            'studentStatus': student.student_status, 'sponsorshipStatus': student.sponsorship_status,
+            'startDate': sponsorship.start_date, 'endDate': sponsorship.end_date, 'active': sponsorship.end_date is None,
+            'hasSponsorshipContract': sponsorship.has_sponsorship_contract,
+            'transactions': {'income': income, 'expense': expense, 'count': totals.get('count', 0)},
+        })
+    active = [s for s in students if s['active']]
+    return {
+        'activeStudentCount': len(active), 'lifetimeStudentCount': len(students),
+        'activeWithContract': sum(1 for s in active if s['hasSponsorshipContract']),
+        'activeWithoutContract': sum(1 for s in active if not s['hasSponsorshipContract']),
+        'transactions': {'income': income_total, 'expense': expense_total, 'net': income_total - expense_total},
+        'students': students,
+    }
@@ -1,3 +1,983 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from django.contrib.auth.models import User, Group
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from . import ai_assistant, mailer, reports, search
+from .sponsorships import recompute_sponsorship_status
+from . import llm
+from .models import Student, Transaction, Task, AuditLog, Sponsor, Sponsorship, AcademicReport, SearchDocument, OutboundEmail
 
-# Create your tests here.
+
+class TransactionSerializationQueryTests(APITestCase):
+    """Serializing the ledger must not issue a query per transaction."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        students = Student.objects.bulk_create([
+            Student(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                    date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            for i in range(10)
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(date=date(2025, 1, 1) + timedelta(days=i), description=f'Fee {i}', amount=10,
+                        type='Expense', category='School Fees', student=students[i % 10] if i % 3 else None)
+            for i in range(60)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_get_all_uses_constant_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/transactions/all/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 60)
+        self.assertEqual(response.data[1]['student_id'], 'S001')
+        self.assertIsNone(response.data[0]['student_id'])
+
+    def test_recent_transactions_uses_constant_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/recent-transactions/')
+        self.assertEqual(len(response.data), 5)
+
+    def test_create_with_student(self):
+        response = self.client.post('/api/transactions/', {
+            'date': '2025-06-01', 'description': 'Uniform', 'amount': '25.00',
+            'type': 'Expense', 'category': 'Supplies', 'student': 'S004',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['student_id'], 'S004')
+
+
+class StreamingExportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Student.objects.create(student_id='S001', first_name='Ana', last_name='Lim',
+                               date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+        Transaction.objects.bulk_create([
+            Transaction(date=date(2025, 1, i + 1), description=f'Fee, {i}', amount=10, type='Income', category='Donation')
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_transactions_csv(self):
+        response = self.client.get('/api/transactions/all/', {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        lines = self._content(response).splitlines()
+        self.assertEqual(lines[0], 'id,date,description,location,amount,type,category,student_id')
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"Fee, 0"', lines[1])
+
+    def test_transactions_ndjson_and_json_stream(self):
+        ndjson = self._content(self.client.get('/api/transactions/all/', {'format': 'ndjson'}))
+        self.assertEqual([json.loads(line)['description'] for line in ndjson.splitlines()], ['Fee, 0', 'Fee, 1', 'Fee, 2'])
+        array = json.loads(self._content(self.client.get('/api/transactions/all/', {'format': 'json-stream'})))
+        self.assertEqual(len(array), 3)
+
+    def test_students_ndjson(self):
+        response = self.client.get('/api/students/all/', {'format': 'ndjson'})
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(rows[0]['student_id'], 'S001')
+        self.assertEqual(rows[0]['sponsors_count'], 0)
+
+    def test_default_response_is_unchanged(self):
+        response = self.client.get('/api/students/all/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+
+class RolePermissionCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Group.objects.create(name='Staff')
+        cls.role.roleprofile.permissions = {'tasks': {'read': True}}
+        cls.role.roleprofile.save()
+        cls.user = User.objects.create_user('staff', 'staff@example.com', 'password')
+        cls.user.groups.add(cls.role)
+        Task.objects.create(title='File annual report', due_date=date(2025, 3, 31))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_steady_state_request_runs_no_permission_queries(self):
+        with self.assertNumQueries(3):  # role lookup, count, page
+            self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+
+    def test_role_edit_invalidates_cached_permissions(self):
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        profile = self.role.roleprofile
+        profile.permissions = {'tasks': {'read': False}}
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 403)
+
+    def test_cache_is_kept_until_the_change_commits(self):
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.groups.clear()
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNotNone(cache.get(f'role_permissions:{self.user.pk}'))
+
+    def test_membership_change_invalidates_cached_permissions(self):
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 403)
+
+
+class StudentBulkImportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Student.objects.create(student_id='S001', first_name='Ana', last_name='Lim',
+                               date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_import_creates_updates_and_reports_row_errors(self):
+        rows = [
+            {'student_id': 'S001', 'school': 'Hope School', 'eep_enroll_date': ''},
+            {'student_id': 'S001', 'school': 'Duplicate'},
+            {'student_id': 'S002', 'first_name': 'Bo', 'last_name': 'Chan', 'date_of_birth': '2013-02-03', 'eep_enroll_date': '2021-01-01'},
+            {'student_id': 'S003', 'first_name': 'Cy', 'last_name': 'Dee', 'date_of_birth': 'not a date', 'eep_enroll_date': '2021-01-01'},
+            {'student_id': 'S004', 'first_name': 'Di'},
+            {'first_name': 'No id'},
+            'S005',
+        ] + [
+            {'student_id': f'N{i:03d}', 'first_name': 'New', 'last_name': str(i), 'date_of_birth': '2014-01-01', 'eep_enroll_date': '2022-01-01'}
+            for i in range(20)
+        ]
+        with self.assertNumQueries(10):  # savepoint, existing rows, insert, update, 5 search index writes, release
+            response = self.client.post('/api/students/bulk_import/', rows, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['createdCount'], 21)
+        self.assertEqual(response.data['updatedCount'], 1)
+        self.assertEqual(response.data['skippedCount'], 5)
+        self.assertIn('Row 7: Expected an object.', response.data['errors'])
+        self.assertIn('rowsPerSecond', response.data)
+        self.assertEqual(Student.objects.get(pk='S001').school, 'Hope School')
+        self.assertEqual(Student.objects.get(pk='S002').date_of_birth, date(2013, 2, 3))
+        self.assertFalse(Student.objects.filter(pk__in=['S003', 'S004']).exists())
+
+
+class BatchedAuditLogTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Student.objects.bulk_create([
+            Student(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                    date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            for i in range(25)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_update_writes_audit_entries_in_one_insert(self):
+        student_ids = list(Student.objects.values_list('student_id', flat=True))
+        # savepoint, select, bulk update, release, content type lookup, audit insert
+        with self.assertNumQueries(6), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/students/bulk_update/', {
+                'student_ids': student_ids, 'updates': {'student_status': 'Active'},
+            }, format='json')
+        self.assertEqual(response.data['updatedCount'], 25)
+        self.assertEqual(AuditLog.objects.filter(action=AuditLog.AuditAction.UPDATE).count(), 25)
+
+    def test_rolled_back_entries_are_discarded(self):
+        from django.db import transaction
+        from . import audit
+        student = Student.objects.get(pk='S000')
+        try:
+            with transaction.atomic():
+                audit.log_action(self.admin, student, AuditLog.AuditAction.UPDATE)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                audit.log_action(self.admin, student, AuditLog.AuditAction.DELETE)
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), [AuditLog.AuditAction.DELETE])
+
+    def test_nested_rollback_discards_only_the_inner_entries(self):
+        from django.db import transaction
+        from . import audit
+        student = Student.objects.get(pk='S000')
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                audit.log_action(self.admin, student, AuditLog.AuditAction.CREATE)
+                try:
+                    with transaction.atomic():
+                        audit.log_action(self.admin, student, AuditLog.AuditAction.DELETE)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                with transaction.atomic():
+                    audit.log_action(self.admin, student, AuditLog.AuditAction.UPDATE)
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('action', flat=True)),
+            sorted([AuditLog.AuditAction.CREATE, AuditLog.AuditAction.UPDATE]),
+        )
+
+    def test_update_records_only_changed_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/students/S001/', {
+                'school': 'Hope School', 'first_name': 'Student', 'date_of_birth': '2012-05-06', 'annual_income': '1200.50',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        entry = AuditLog.objects.get(action=AuditLog.AuditAction.UPDATE)
+        self.assertEqual(entry.changes, {
+            'school': {'old': '', 'new': 'Hope School'},
+            'date_of_birth': {'old': '2012-01-01', 'new': '2012-05-06'},
+            'annual_income': {'old': '0.00', 'new': '1200.50'},
+        })
+
+
+class StudentBulkDetailsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        sponsor = Sponsor.objects.create(name='Grace', email='grace@example.com', sponsorship_start_date=date(2020, 1, 1))
+        for i in range(30):
+            student = Student.objects.create(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                                             date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            Sponsorship.objects.create(student=student, sponsor=sponsor, start_date=date(2021, 1, 1))
+            AcademicReport.objects.create(student=student, report_period='2024 T1', grade_level='5', pass_fail_status='Pass')
+        cls.student_ids = [f'S{i:03d}' for i in range(30)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_full_details_use_fixed_queries(self):
+        with self.assertNumQueries(5):  # students + one query per nested relation
+            response = self.client.post('/api/students/bulk_details/', {'student_ids': self.student_ids}, format='json')
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(response.data[0]['sponsorships'][0]['sponsor_name'], 'Grace')
+        self.assertEqual(len(response.data[0]['academic_reports']), 1)
+
+    def test_projection_skips_unrequested_relations(self):
+        with self.assertNumQueries(2):  # students + sponsorships
+            response = self.client.post('/api/students/bulk_details/', {
+                'student_ids': self.student_ids, 'fields': ['first_name', 'last_name'], 'expand': ['sponsorships'],
+            }, format='json')
+        self.assertEqual(set(response.data[0]), {'first_name', 'last_name', 'sponsorships'})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.post('/api/students/bulk_details/', {'student_ids': ['S000'], 'fields': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_field_list_is_rejected(self):
+        for fields in (5, {'first_name': True}, ['first_name', 3]):
+            response = self.client.post('/api/students/bulk_details/', {'student_ids': ['S000'], 'fields': fields}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_roster_actions_load_only_listed_columns(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        for url, queries in (('/api/students/', 2), ('/api/students/all/', 1)):  # list adds the page count
+            with self.assertNumQueries(queries), CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url)
+            rows = response.data['results'] if 'results' in response.data else response.data
+            self.assertEqual(rows[0]['sponsors_count'], 1)
+            # Long free-text columns (stories, notes, family details) are never read for the roster.
+            self.assertNotIn('child_story', captured[-1]['sql'])
+            self.assertNotIn('father_details', captured[-1]['sql'])
+
+    def test_sponsor_filter_and_count_need_no_join_or_group_by(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        other = Sponsor.objects.create(name='Abel', email='abel@example.com', sponsorship_start_date=date(2020, 1, 1))
+        Sponsorship.objects.create(student_id='S001', sponsor=other, start_date=date(2022, 1, 1))
+        Sponsorship.objects.create(student_id='S002', sponsor=other, start_date=date(2022, 1, 1), end_date=date(2023, 1, 1))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(f'/api/students/all/?sponsor={other.pk}&ordering=-sponsors_count')
+        self.assertEqual([(row['student_id'], row['sponsors_count']) for row in response.data], [('S001', 2), ('S002', 1)])
+        self.assertNotIn('GROUP BY "core_student"', captured[0]['sql'])
+        self.assertNotIn('JOIN', captured[0]['sql'].split(' WHERE ')[0])
+
+    def test_retrieve_prefetches_each_relation_once(self):
+        with self.assertNumQueries(5):  # student + sponsorships, reports, follow-ups, documents
+            response = self.client.get('/api/students/S001/')
+        self.assertEqual(response.data['sponsorships'][0]['sponsor_name'], 'Grace')
+        self.assertEqual(len(response.data['academic_reports']), 1)
+
+
+class LookupCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Sponsor.objects.create(name='Grace', email='grace@example.com', sponsorship_start_date=date(2020, 1, 1))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def test_unchanged_lookup_is_served_from_cache_and_etag(self):
+        first = self.client.get('/api/sponsors/lookup/')
+        self.assertEqual(first.data, [{'id': Sponsor.objects.get().id, 'name': 'Grace'}])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/sponsors/lookup/').data, first.data)
+            not_modified = self.client.get('/api/sponsors/lookup/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(LOOKUP_VERSION_TIMEOUT=None)
+    def test_etag_outlives_the_cached_payload(self):
+        from .caching import get_table_version
+        first = self.client.get('/api/sponsors/lookup/')
+        cache.delete(f'lookup:core.sponsor:{get_table_version(Sponsor)}')  # the payload expired
+        self.assertEqual(self.client.get('/api/sponsors/lookup/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.client.get('/api/sponsors/lookup/')['ETag'], first['ETag'])
+
+    def test_write_changes_the_version(self):
+        first = self.client.get('/api/sponsors/lookup/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Sponsor.objects.create(name='Abel', email='abel@example.com', sponsorship_start_date=date(2021, 1, 1))
+        # Until the write commits, lookups keep serving the old version.
+        self.assertEqual(self.client.get('/api/sponsors/lookup/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        for callback in callbacks: callback()
+        second = self.client.get('/api/sponsors/lookup/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual([row['name'] for row in second.data], ['Abel', 'Grace'])
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+
+class SearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.student = Student.objects.create(student_id='EEP-001', first_name='Sophea', last_name='Chan',
+                                             date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+        Student.objects.create(student_id='EEP-002', first_name='Dara', last_name='Sok',
+                               date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+        Sponsor.objects.create(name='Grace Chan', email='grace@example.com', sponsorship_start_date=date(2020, 1, 1))
+        Transaction.objects.create(date=date(2025, 1, 1), description='Uniforms for Sophea', amount=20,
+                                   type='Expense', category='Supplies')
+
+    def setUp(self):
+        search._vocabulary.invalidate()
+        self.client.force_authenticate(self.admin)
+
+    def test_saves_maintain_the_index(self):
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.student.last_name = 'Keo'
+        self.student.save()
+        self.assertEqual([r['title'] for r in search.search('keo')], ['Sophea Keo'])
+        self.student.delete()
+        self.assertEqual(search.search('keo'), [])
+
+    def test_ranked_prefix_and_typo_tolerant_results(self):
+        response = self.client.get('/api/search/', {'q': 'sophea chan'})
+        self.assertEqual(response.data['results'][0]['id'], 'EEP-001')  # matches both terms
+        self.assertEqual([r['title'] for r in self.client.get('/api/search/', {'q': 'sopea'}).data['results']][0], 'Sophea Chan')
+        self.assertEqual(search.search('eep001')[0]['id'], 'EEP-001')
+        self.assertEqual([r['type'] for r in search.search('gra')], ['sponsor'])
+
+    def test_results_are_limited_to_readable_modules(self):
+        user = User.objects.create_user('clerk', 'clerk@example.com', 'password')
+        group = Group.objects.create(name='Clerk')
+        group.roleprofile.permissions = {'sponsors': {'read': True}}
+        group.roleprofile.save()
+        user.groups.add(group)
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/search/', {'q': 'chan'})
+        self.assertEqual([r['type'] for r in response.data['results']], ['sponsor'])
+
+
+@override_settings(AI_LLM_CLIENT='core.llm.FakeLLMClient', BACKGROUND_TASKS_EAGER=True)
+class AIJobTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', 'staff@example.com', 'password')
+
+    def setUp(self):
+        llm.clear_clients()
+        self.fake = llm.get_client()
+        ai_assistant.student_filter_cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def submit_and_poll(self, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            submitted = self.client.post(url, data, format='json')
+        self.assertEqual(submitted.status_code, 202)
+        return self.client.get(f"/api/ai-assistant/jobs/{submitted.data['id']}/")
+
+    def test_student_filters_run_as_a_job(self):
+        self.fake.replies.append('```json\n{"gender": "Female"}\n```')
+        job = self.submit_and_poll('/api/ai-assistant/student-filters/', {'query': 'girls'})
+        self.assertEqual((job.data['status'], job.data['result']), ('succeeded', {'gender': 'Female'}))
+        self.assertIn('"girls"', self.fake.calls[0])
+
+    def test_invalid_llm_output_fails_the_job(self):
+        self.fake.replies.append('not json')
+        job = self.submit_and_poll('/api/ai-assistant/student-filters/', {'query': 'girls'})
+        self.assertEqual(job.data['status'], 'failed')
+        self.assertIn('invalid format', job.data['error'])
+
+    def test_jobs_are_private_to_their_owner(self):
+        job = self.submit_and_poll('/api/ai-assistant/query/', {'prompt': 'How many students?'})
+        self.assertEqual(job.data['result'], {'response': 'Fake response to: How many students?'})
+        self.client.force_authenticate(User.objects.create_user('other', 'other@example.com', 'password'))
+        self.assertEqual(self.client.get(f"/api/ai-assistant/jobs/{job.data['id']}/").status_code, 404)
+
+    def test_repeated_filter_query_is_served_from_cache(self):
+        self.fake.replies.append('{"sponsorship_status": "Unsponsored", "gender": "Female"}')
+        self.submit_and_poll('/api/ai-assistant/student-filters/', {'query': 'Unsponsored girls'})
+        repeat = self.client.post('/api/ai-assistant/student-filters/', {'query': '  unsponsored GIRLS?'}, format='json')
+        self.assertEqual((repeat.status_code, repeat['X-AI-Cache']), (200, 'hit'))
+        self.assertEqual(repeat.data['result'], {'sponsorship_status': 'Unsponsored', 'gender': 'Female'})
+        self.assertEqual(len(self.fake.calls), 1)
+        self.assertEqual(ai_assistant.student_filter_cache.stats()['hits'], 1)
+
+    def test_translations_with_unknown_choices_are_not_reused(self):
+        self.fake.replies.extend(['{"student_status": "Graduated"}', '{"student_status": "Graduated"}'])
+        for _ in range(2):
+            self.submit_and_poll('/api/ai-assistant/student-filters/', {'query': 'graduates'})
+        self.assertEqual(len(self.fake.calls), 2)
+
+    def test_client_is_reused_and_calls_are_instrumented(self):
+        llm.metrics.reset()
+        self.assertIs(llm.get_client(), llm.get_client())
+        self.submit_and_poll('/api/ai-assistant/query/', {'prompt': 'How many students?'})
+        chat = llm.metrics.snapshot()['chat']
+        self.assertEqual((chat['calls'], chat['errors'], chat['promptTokens']), (1, 0, 3))
+
+
+@override_settings(REPORTS_ROOT=os.path.join(tempfile.gettempdir(), 'ngo_reports_tests'))
+class ReportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        sponsors = [Sponsor.objects.create(name=name, email=f'{name}@example.com', sponsorship_start_date=date(2020, 1, 1))
+                    for name in ('Grace', 'Abel', 'Cora')]
+        students = Student.objects.bulk_create([
+            Student(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                    date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            for i in range(30)
+        ])
+        Sponsorship.objects.bulk_create(
+            [Sponsorship(student=s, sponsor=sponsors[0]) for s in students[::2]]
+            + [Sponsorship(student=students[0], sponsor=sponsors[1]),
+               Sponsorship(student=students[2], sponsor=sponsors[1], end_date=date(2021, 1, 1)),
+               Sponsorship(student=students[4], sponsor=sponsors[2], end_date=date(2021, 1, 1))]
+        )
+        Transaction.objects.bulk_create([
+            Transaction(date=date(2024, 1, 5), description='Gift', category='Donation', amount=500, type=Transaction.TransactionType.INCOME),
+            Transaction(date=date(2024, 1, 9), description='Books', category='Supplies', amount=120.5, type=Transaction.TransactionType.EXPENSE),
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def report(self, *args, **kwargs):
+        return json.loads(ai_assistant.generate_report(*args, **kwargs).split('\n', 1)[1])
+
+    def download_lines(self, payload):
+        response = self.client.get(payload['downloadUrl'])
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_roster_streams_in_two_queries(self):
+        with self.assertNumQueries(2):
+            rows = list(reports.roster_rows(reports.roster_queryset()))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual([row['sponsorName'] for row in rows[:3]], ['Abel, Grace', 'N/A', 'Grace'])
+
+    def test_report_is_written_to_a_file_and_downloaded(self):
+        payload = self.report('student_roster', 'csv', sponsor_name='grace')
+        self.assertEqual(payload['rowCount'], 15)
+        self.assertNotIn('data', payload)
+        lines = self.download_lines(payload)
+        self.assertEqual((len(lines), lines[0].split(',')[0]), (16, 'Student ID'))
+        self.assertEqual(self.client.get(payload['downloadUrl'][:-3] + 'xx/').status_code, 404)
+
+    def test_sponsor_without_active_sponsorships_gets_an_empty_roster(self):
+        self.assertEqual(self.report('student_roster', 'csv', sponsor_name='Cora')['rowCount'], 0)
+        self.assertEqual(ai_assistant.generate_report('student_roster', 'csv', sponsor_name='Nobody'),
+                         "Sponsor named 'Nobody' not found.")
+
+    def test_financial_report_starts_with_the_summary(self):
+        payload = self.report('financial', 'csv', start_date='2024-01-01', end_date='2024-01-31')
+        lines = self.download_lines(payload)
+        self.assertEqual(lines[:7], [
+            'AI Generated Financial Summary', 'Date Range: 2024-01-01 to 2024-01-31', 'Total Income: $500.00',
+            'Total Expenses: $120.50', 'Net Balance: $379.50', '', 'Date,Description,Category,Type,Amount',
+        ])
+        self.assertEqual(len(lines), 9)
+
+    def test_download_requires_read_access_to_the_report_module(self):
+        payload = self.report('student_roster', 'csv')
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(payload['downloadUrl']).status_code, 401)
+        role = Group.objects.create(name='Bookkeeper')
+        role.roleprofile.permissions = {'transactions': {'read': True}}
+        role.roleprofile.save()
+        user = User.objects.create_user('bookkeeper', 'bookkeeper@example.com', 'password')
+        user.groups.add(role)
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(payload['downloadUrl']).status_code, 403)
+        financial = self.report('financial', 'csv', start_date='2024-01-01', end_date='2024-01-31')
+        self.assertEqual(self.client.get(financial['downloadUrl']).status_code, 200)
+
+    def test_xlsx_report(self):
+        from openpyxl import load_workbook
+        payload = self.report('student_roster', 'xlsx')
+        path, _, _ = reports.resolve_download(payload['downloadUrl'].rstrip('/').rsplit('/', 1)[1])
+        self.assertEqual(load_workbook(path).active.max_row, 31)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class EmailOutboxTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Group.objects.create(name='Staff')
+
+    def test_password_reset_is_queued_and_delivered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/users/request-password-reset/', {'email': 'ADMIN@example.com'}, format='json')
+            self.client.post('/api/users/request-password-reset/', {'email': 'nobody@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('/#/reset-password/', mail.outbox[0].body)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.Status.SENT)
+
+    def test_invitation_uses_the_outbox(self):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/users/invite/', {'email': 'new@extremelove.com', 'role': 'Staff'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox[0].to, ['new@extremelove.com'])
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        message = mailer.queue_email('Hi', 'Body', ['a@example.com'])
+        with self.assertLogs('core.mailer', 'WARNING'), \
+                mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(mailer.deliver_pending(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('queued', 1, 'down'))
+        self.assertEqual(mailer.deliver_pending(), (0, 0))  # not due yet
+        OutboundEmail.objects.update(next_attempt_at=message.created_at)
+        self.assertEqual(mailer.deliver_pending(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_senders_that_saw_the_same_rows_never_share_one(self):
+        for i in range(3): mailer.queue_email('Hi', 'Body', [f'{i}@example.com'])
+        due = mailer._due_ids(10)
+        # Both senders read the due ids before either claims them.
+        with mock.patch('core.mailer._due_ids', return_value=due):
+            first, second = mailer._claim_batch(10), mailer._claim_batch(10)
+        self.assertEqual((len(first), second), (3, []))
+
+
+class SponsorshipStatusTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sponsor = Sponsor.objects.create(name='Grace', email='grace@example.com', sponsorship_start_date=date(2020, 1, 1))
+        cls.students = Student.objects.bulk_create([
+            Student(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                    date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            for i in range(20)
+        ])
+
+    def statuses(self):
+        return set(Student.objects.values_list('sponsorship_status', 'student_status'))
+
+    def test_single_save_updates_status_in_one_query(self):
+        sponsorship = Sponsorship(student=self.students[0], sponsor=self.sponsor)
+        with self.assertNumQueries(3):  # insert + status UPDATE + sponsor counters UPDATE
+            sponsorship.save()
+        self.assertEqual(Student.objects.get(pk='S000').sponsorship_status, 'Sponsored')
+        sponsorship.end_date = date(2025, 1, 1)
+        sponsorship.save()
+        self.assertEqual(Student.objects.get(pk='S000').sponsorship_status, 'Unsponsored')
+
+    def test_bulk_create_then_set_based_recompute(self):
+        Sponsorship.objects.bulk_create([Sponsorship(student=s, sponsor=self.sponsor) for s in self.students])
+        with self.assertNumQueries(1):
+            self.assertEqual(recompute_sponsorship_status([s.pk for s in self.students]), 20)
+        self.assertEqual(self.statuses(), {('Sponsored', 'Active')})
+        self.assertEqual(recompute_sponsorship_status(), 0)
+
+    def test_deleting_a_sponsor_unsponsors_its_students(self):
+        Sponsorship.objects.bulk_create([Sponsorship(student=s, sponsor=self.sponsor) for s in self.students])
+        recompute_sponsorship_status()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.assertEqual(self.client.delete(f'/api/sponsors/{self.sponsor.pk}/').status_code, 204)
+        self.assertEqual(self.statuses(), {('Unsponsored', 'Active')})
+
+
+class BulkSponsorshipTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.sponsors = [Sponsor.objects.create(name=name, email=f'{name}@example.com', sponsorship_start_date=date(2020, 1, 1))
+                        for name in ('Grace', 'Abel')]
+        Student.objects.bulk_create([
+            Student(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                    date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            for i in range(40)
+        ])
+        Sponsorship.objects.create(student_id='S000', sponsor=cls.sponsors[0])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_assignment_uses_fixed_queries_and_reports_conflicts(self):
+        grace, abel = self.sponsors[0].pk, self.sponsors[1].pk
+        rows = [{'student': f'S{i:03d}', 'sponsor': grace, 'start_date': '2025-09-01'} for i in range(40)]
+        rows += [{'student': 'S001', 'sponsor': grace}, {'student': 'NOPE', 'sponsor': grace},
+                 {'student': 'S001', 'sponsor': abel, 'start_date': 'soon'}]
+        # savepoint, students, sponsors, existing pairs, insert, status update, counters update, content type, audit insert, release
+        with self.assertNumQueries(10), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sponsorships/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['createdCount'], response.data['conflictCount']), (39, 4))
+        self.assertEqual([c['index'] for c in response.data['conflicts']], [0, 40, 41, 42])
+        self.assertEqual(Student.objects.filter(sponsorship_status='Sponsored').count(), 40)
+        self.assertEqual(AuditLog.objects.filter(action='CREATE').count(), 39)
+
+class KeysetPaginationTests(APITestCase):
+    """Cursor pages walk (date, id) with one query each and never repeat or skip a row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        # Three rows per day, so most page boundaries fall between rows sharing a date.
+        Transaction.objects.bulk_create([
+            Transaction(date=date(2025, 1, 1) + timedelta(days=i // 3), description=f'Fee {i}', amount=10,
+                        type='Expense', category='School Fees')
+            for i in range(40)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        expected = list(Transaction.objects.order_by('-date', '-id').values_list('id', flat=True))
+        seen, url = [], '/api/transactions/?pagination=cursor&page_size=7'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertIsNone(response.data['count'])
+            seen += [row['id'] for row in response.data['results']]
+            last, url = response.data, response.data['next']
+        self.assertEqual(seen, expected)
+
+        backwards, url = [], last['previous']
+        while url:
+            response = self.client.get(url)
+            backwards = [row['id'] for row in response.data['results']] + backwards
+            url = response.data['previous']
+        self.assertEqual(backwards, expected[:35])
+        self.assertEqual(response.data['next'].count('cursor='), 1)
+
+    def test_counts_are_opt_in_and_page_numbers_still_work(self):
+        response = self.client.get('/api/transactions/?pagination=cursor&count=exact')
+        self.assertEqual(response.data['count'], 40)
+        self.assertEqual(self.client.get('/api/transactions/?pagination=cursor&count=estimate').data['count'], 40)
+        response = self.client.get('/api/transactions/?page=2')
+        self.assertEqual(response.data['count'], 40)
+        self.assertEqual(self.client.get('/api/transactions/?cursor=garbage').status_code, 404)
+
+class AuditArchiveTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        student = Student.objects.create(student_id='S001', first_name='Student', last_name='One',
+                                         date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+        from django.contrib.contenttypes.models import ContentType
+        from django.utils import timezone
+        content_type = ContentType.objects.get(app_label='core', model='student')
+        now = timezone.now()
+        # 30 rows a week apart: the oldest ~26 fall outside a 30-day retention window.
+        for i in range(30):
+            log = AuditLog.objects.create(action='UPDATE' if i % 2 else 'CREATE', content_type=content_type,
+                                          object_id=student.pk, object_repr=str(student), changes={'n': i})
+            AuditLog.objects.filter(pk=log.pk).update(timestamp=now - timedelta(weeks=i))
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        self.enterContext(override_settings(AUDIT_ARCHIVE_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def test_old_rows_move_to_monthly_archives_and_stay_queryable(self):
+        from . import audit_archive
+        from .models import AuditLogArchive
+        from django.utils import timezone
+        old = AuditLog.objects.filter(timestamp__lt=timezone.now() - timedelta(days=30))
+        expected = sorted(old.values_list('changes__n', flat=True))
+        archives = audit_archive.archive_logs(30)
+        self.assertEqual(sum(a.row_count for a in archives), len(expected))
+        self.assertTrue(all(a.start.day == 1 for a in archives[1:]))
+        self.assertFalse(old.exists())
+        self.assertEqual(AuditLog.objects.count(), 30 - len(expected))
+        self.assertEqual(audit_archive.archive_logs(30), [])
+
+        start = AuditLogArchive.objects.order_by('start').first().start.date().isoformat()
+        response = self.client.get(f'/api/audit-logs/archived/?start={start}&end={timezone.now().date()}')
+        self.assertEqual(sorted(row['changes']['n'] for row in response.data['results']), expected)
+        self.assertEqual(response.data['results'][0]['changes']['n'], min(expected))
+        response = self.client.get(f'/api/audit-logs/archived/?start={start}&end={timezone.now().date()}&action=CREATE')
+        self.assertTrue(all(row['action'] == 'CREATE' for row in response.data['results']))
+        self.assertEqual(self.client.get('/api/audit-logs/archived/?start=nope').status_code, 400)
+
+class SponsorPortfolioTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.grace, cls.abel = (Sponsor.objects.create(name=name, email=f'{name}@example.com', sponsorship_start_date=date(2020, 1, 1))
+                               for name in ('Grace', 'Abel'))
+        cls.students = Student.objects.bulk_create([
+            Student(student_id=f'S{i:03d}', first_name='Student', last_name=str(i),
+                    date_of_birth=date(2012, 1, 1), eep_enroll_date=date(2020, 1, 1))
+            for i in range(12)
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(date=date(2025, 1, 1 + i % 2), description='Fee', amount=10 * (i % 3 + 1),
+                        type='Expense' if i % 4 else 'Income', category='School Fees', student=cls.students[i % 12])
+            for i in range(48)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def counters(self, sponsor):
+        sponsor.refresh_from_db()
+        return sponsor.active_student_count, sponsor.lifetime_student_count, sponsor.latest_start_date
+
+    def test_counters_follow_sponsorship_changes(self):
+        first = Sponsorship.objects.create(student=self.students[0], sponsor=self.grace, start_date=date(2021, 5, 1))
+        Sponsorship.objects.create(student=self.students[1], sponsor=self.grace, start_date=date(2022, 5, 1))
+        self.assertEqual(self.counters(self.grace), (2, 2, date(2022, 5, 1)))
+        first = Sponsorship.objects.get(pk=first.pk)
+        first.end_date = date(2023, 1, 1)
+        first.save()
+        self.assertEqual(self.counters(self.grace), (1, 2, date(2022, 5, 1)))
+        first.sponsor = self.abel
+        first.save()  # moved: both sponsors are recounted
+        self.assertEqual((self.counters(self.grace), self.counters(self.abel)), ((1, 1, date(2022, 5, 1)), (0, 1, date(2021, 5, 1))))
+        first.delete()
+        self.assertEqual(self.counters(self.abel), (0, 0, None))
+        self.client.post('/api/sponsorships/bulk/', [{'student': s.pk, 'sponsor': self.abel.pk} for s in self.students[4:9]], format='json')
+        response = self.client.get('/api/sponsors/?ordering=-sponsored_student_count')
+        self.assertEqual([(s['name'], s['sponsored_student_count'], s['lifetime_student_count']) for s in response.data['results']],
+                         [('Abel', 5, 5), ('Grace', 1, 1)])
+
+    def test_portfolio_uses_fixed_queries(self):
+        Sponsorship.objects.bulk_create(
+            [Sponsorship(student=s, sponsor=self.grace, has_sponsorship_contract=i % 2 == 0) for i, s in enumerate(self.students[:10])]
+            + [Sponsorship(student=self.students[10], sponsor=self.grace, end_date=date(2024, 1, 1))]
+        )
+        with self.assertNumQueries(3):  # sponsor, sponsorships with students, transaction totals
+            response = self.client.get(f'/api/sponsors/{self.grace.pk}/portfolio/')
+        data = response.data
+        self.assertEqual((data['activeStudentCount'], data['lifetimeStudentCount'], data['activeWithContract']), (10, 11, 5))
+        expected = Transaction.objects.filter(student__in=self.students[:11])
+        self.assertEqual(data['transactions']['expense'], sum(t.amount for t in expected if t.type == 'Expense'))
+        self.assertEqual(sum(s['transactions']['count'] for s in data['students']), expected.count())
+        narrowed = self.client.get(f'/api/sponsors/{self.grace.pk}/portfolio/?start=2025-01-02&end=2025-01-02').data
+        self.assertEqual(sum(s['transactions']['count'] for s in narrowed['students']), expected.filter(date=date(2025, 1, 2)).count())
+
+class UserListQueryTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        roles = [Group.objects.create(name=name) for name in ('Staff', 'Viewer')]
+        roles[0].roleprofile.permissions = {'tasks': {'read': True}}
+        roles[0].roleprofile.save()
+        for i in range(12):
+            User.objects.create_user(f'user{i:02d}', f'user{i:02d}@example.com', 'password').groups.add(roles[i % 2])
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_user_list_queries_do_not_grow_with_head_count(self):
+        with self.assertNumQueries(3):  # count, page, groups with role profiles
+            response = self.client.get('/api/users/?page_size=100')
+        self.assertEqual(response.data['count'], 13)
+        by_name = {user['username']: user for user in response.data['results']}
+        self.assertEqual((by_name['user00']['role'], by_name['user00']['permissions']), ('Staff', {'tasks': {'read': True}}))
+        self.assertEqual(by_name['user01']['role'], 'Viewer')
+        self.assertEqual(by_name['admin']['role'], 'Administrator')
+
+    def test_role_change_is_reflected_in_the_response(self):
+        user = User.objects.get(username='user00')
+        response = self.client.patch(f'/api/users/{user.pk}/', {'role': 'Viewer'}, format='json')
+        self.assertEqual(response.data['role'], 'Viewer')
+
+@override_settings(STATELESS_JWT_AUTH=True)
+class StatelessJWTTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Group.objects.create(name='Staff')
+        cls.role.roleprofile.permissions = {'tasks': {'read': True, 'create': True}}
+        cls.role.roleprofile.save()
+        cls.user = User.objects.create_user('staff', 'staff@example.com', 'password')
+        cls.user.groups.add(cls.role)
+        Task.objects.create(title='File annual report', due_date=date(2025, 3, 31))
+
+    def setUp(self):
+        cache.clear()
+        self.login()
+
+    def login(self):
+        self.tokens = self.client.post('/api/token/', {'username': 'staff', 'password': 'password'}, format='json').data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def test_reads_are_authorized_from_token_claims(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        claims = AccessToken(self.tokens['access'])
+        self.assertEqual((claims['role'], claims['perms']), ('Staff', {'tasks': {'read': True, 'create': True}}))
+        with self.assertNumQueries(2):  # count + page; no user, group or role profile reads
+            self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        self.assertEqual(self.client.get('/api/students/').status_code, 403)
+        self.assertEqual(self.client.get('/api/user/me/').data['email'], 'staff@example.com')
+
+    def test_writes_use_the_database_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tasks/', {'title': 'Call donor', 'due_date': '2025-04-01'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(AuditLog.objects.get(object_repr__contains='Call donor').user, self.user)
+
+    def test_role_edit_forces_a_refresh_with_new_claims(self):
+        profile = self.role.roleprofile
+        profile.permissions = {'tasks': {'read': False}}
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+        access = self.client.post('/api/token/refresh/', {'refresh': self.tokens['refresh']}, format='json').data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 403)
+
+    def test_evicted_revision_falls_back_to_the_database(self):
+        cache.clear()
+        with self.assertNumQueries(4):  # user, role permissions, count, page
+            self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    def test_bump_after_eviction_still_rejects_old_tokens(self):
+        from .permissions import bump_auth_revision
+        cache.clear()
+        bump_auth_revision([self.user.pk])
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    @override_settings(STATELESS_JWT_AUTH=False)
+    def test_without_a_shared_cache_reads_load_the_user(self):
+        with self.assertNumQueries(4):  # user, role permissions, count, page
+            self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    def test_deactivated_user_cannot_refresh(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.post('/api/token/refresh/', {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+class DashboardRollupTests(APITestCase):
+    """The monthly rollup follows every ledger change and matches a full rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def buckets(self):
+        from .models import MonthlyTransactionRollup
+        return {(r.month, r.type): (r.total, r.count) for r in MonthlyTransactionRollup.objects.exclude(count=0)}
+
+    def add(self, day, txn_type, amount):
+        return Transaction.objects.create(date=day, description='Entry', amount=amount, type=txn_type, category='General')
+
+    def test_create_update_and_delete_apply_deltas(self):
+        from decimal import Decimal
+        fee = self.add(date(2025, 5, 10), 'Expense', 40)
+        self.add(date(2025, 5, 20), 'Expense', 10)
+        gift = self.add(date(2025, 6, 1), 'Income', 100)
+        self.assertEqual(self.buckets(), {(date(2025, 5, 1), 'Expense'): (Decimal('50.00'), 2), (date(2025, 6, 1), 'Income'): (Decimal('100.00'), 1)})
+
+        fee.amount = 25
+        fee.save()
+        self.assertEqual(self.buckets()[(date(2025, 5, 1), 'Expense')], (Decimal('35.00'), 2))
+        fee.date, fee.type = date(2025, 6, 3), 'Income'  # moves month and type at once
+        fee.save()
+        self.assertEqual(self.buckets(), {(date(2025, 5, 1), 'Expense'): (Decimal('10.00'), 1), (date(2025, 6, 1), 'Income'): (Decimal('125.00'), 2)})
+        gift.delete()
+        self.assertEqual(self.buckets()[(date(2025, 6, 1), 'Income')], (Decimal('25.00'), 1))
+
+    def test_live_deltas_match_a_rebuild(self):
+        from .dashboard import rebuild_monthly_rollup
+        entries = [self.add(date(2025, 1 + i % 6, 1 + i), 'Income' if i % 3 else 'Expense', 5 * i + 1) for i in range(18)]
+        entries[4].amount = 999
+        entries[4].save()
+        entries[7].delete()
+        live = self.buckets()
+        rebuild_monthly_rollup()
+        self.assertEqual(self.buckets(), live)
+
+    def test_stats_report_twelve_months_from_the_rollup(self):
+        self.add(date(2024, 7, 15), 'Income', 70)  # first month of the window
+        self.add(date(2024, 6, 15), 'Income', 999)  # just before it
+        self.add(date(2025, 6, 2), 'Expense', 30)
+        self.add(date(2025, 6, 9), 'Income', 200)
+        response = self.client.get('/api/dashboard/stats/?start_date=2025-06-01&end_date=2025-06-30')
+        breakdown = response.data['monthly_breakdown']
+        self.assertEqual(len(breakdown), 12)
+        self.assertEqual(breakdown[0], {'month': 'Jul 24', 'income': 70.0, 'expense': 0.0})
+        self.assertEqual(breakdown[-1], {'month': 'Jun 25', 'income': 200.0, 'expense': 30.0})
+        self.assertEqual(response.data['stats']['net_balance'], 170.0)
+
+class BenchmarkCommandTests(APITestCase):
+
+    def test_benchmark_runs_and_rolls_back(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        out = StringIO()
+        call_command('benchmark_list_endpoints', students=30, transactions=30, audit_logs=30, tasks=30, filings=10,
+                     repeat=1, no_plans=True, stdout=out)
+        self.assertIn('audit: object type', out.getvalue())
+        self.assertRegex(out.getvalue(), r'get_all\s+1\s+[\d.]+ KiB')
+        self.assertIn('Benchmark data rolled back.', out.getvalue())
+        self.assertFalse(Student.objects.exists())
+        # Every declared list-endpoint index exists (migration 0011 and later) and survived the rollback.
+        from .management.commands.benchmark_list_endpoints import INDEXED_MODELS
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                for index in model._meta.indexes:
+                    self.assertIn(index.name, existing)
@@ -0,0 +1,101 @@
+# backend/core/tokens.py
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework import permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import RoleProfile
+from .permissions import current_auth_revision, get_auth_revision
+
+REVISION_CLAIM = 'rev'
+
+def role_claims(user):
+    """The claims StatelessJWTAuthentication needs to authorize `user` without a database read."""
+    group = user.groups.select_related('roleprofile').order_by('pk').first()
+    try:
+        permissions_data = group.roleprofile.permissions if group and not user.is_superuser else {}
+    except RoleProfile.DoesNotExist:
+        permissions_data = {}
+    return {
+        'username': user.username, 'is_superuser': user.is_superuser, 'is_staff': user.is_staff,
+        'role': 'Administrator' if user.is_superuser else (group.name if group else None),
+        'perms': permissions_data, REVISION_CLAIM: current_auth_revision(user.pk),
+    }
+
+class RoleRefreshToken(RefreshToken):
+    """A refresh token whose access tokens embed the user's role, module permissions and auth revision."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        # Claims are read fresh on every refresh, never copied from an older token.
+        user = getattr(self, 'user', None) or User.objects.filter(
+            **{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not user.is_active:
+            raise TokenError('User is inactive or no longer exists.')
+        for claim, value in role_claims(user).items():
+            access[claim] = value
+        return access
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RoleRefreshToken
+
+def user_from_claims(token):
+    """
+    An unsaved User carrying only what the claims say. It is never written back: the
+    authentication class below only hands it out for read-only requests.
+    """
+    user = User(
+        **{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]},
+        username=token['username'], is_superuser=token['is_superuser'], is_staff=token['is_staff'], is_active=True,
+    )
+    user._state.adding, user._state.db = False, 'default'
+    user.claimed_role, user.claimed_permissions = token['role'], token['perms']
+    return user
+
+def database_user(user):
+    """The full User row for `user`, loading it only if `user` was built from token claims."""
+    return User.objects.get(pk=user.pk) if hasattr(user, 'claimed_permissions') else user
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    For GET/HEAD/OPTIONS, authenticates from the access token's claims with no database
+    query; HasModulePermission then reads the permissions from the token as well. A token
+    older than the user's last role or account change (its `rev` is behind the revision in
+    the cache) is rejected, so the client refreshes and gets current claims.
+
+    That check is only sound when every worker shares the cache, so this is enabled by
+    STATELESS_JWT_AUTH (set when REDIS_URL is). Otherwise, and whenever the revision is
+    missing from the cache, requests authenticate like stock JWTAuthentication. Writes
+    always load the real user, since they record it in audit rows.
+    """
+
+    def authenticate(self, request):
+        if not settings.STATELESS_JWT_AUTH or request.method not in permissions.SAFE_METHODS:
+            return super().authenticate(request)
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        revision = get_auth_revision(validated_token[api_settings.USER_ID_CLAIM]) if REVISION_CLAIM in validated_token else None
+        if revision is None:
+            # Issued before role claims existed, or the revision was evicted: check the database.
+            return self.get_user(validated_token), validated_token
+        if validated_token[REVISION_CLAIM] < revision:
+            raise InvalidToken('Token permissions are out of date.')
+        return user_from_claims(validated_token), validated_token
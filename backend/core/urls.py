@@ -23,8 +23,12 @@ router.register(r'sponsorships', views.SponsorshipViewSet, basename='sponsorship
 urlpatterns = [
     path('dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
     path('dashboard/recent-transactions/', views.recent_transactions, name='recent-transactions'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('ai-assistant/query/', views.query_ai_assistant, name='ai-assistant-query'),
     path('ai-assistant/student-filters/', views.AIAssistantStudentFilterView.as_view(), name='ai_student_filters'),
+    path('ai-assistant/jobs/<uuid:job_id>/', views.ai_job_detail, name='ai-job-detail'),
+    path('ai-assistant/metrics/', views.ai_metrics, name='ai-metrics'),
+    path('reports/download/<str:token>/', views.download_report, name='report-download'),
     path('user/me/', views.get_current_user, name='current-user'),
     path('register/', views.UserRegistrationView.as_view(), name='user-registration'),
     
@@ -2,24 +2,23 @@
 
 from datetime import date, timedelta
 from dateutil.parser import parse as parse_date
-from django.db.models import Sum, Count, Q
+from django.db.models import F, Prefetch
+from django.http import FileResponse, Http404
+from django.utils import timezone
 from django.db import transaction
-from django.core.mail import send_mail
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User, Group
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import force_bytes
 from django.template.loader import render_to_string
 from rest_framework import viewsets, status, filters, generics, permissions
 from rest_framework.decorators import api_view, action, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response    
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from .models import (
     Student, AcademicReport, FollowUpRecord, Transaction, 
-    GovernmentFiling, Task, StudentStatus, AuditLog, Sponsor, RoleProfile,
-    StudentDocument, Sponsorship
+    GovernmentFiling, Task, AuditLog, Sponsor, RoleProfile,
+    StudentDocument, Sponsorship, AIJob
 )
 from .serializers import (
     StudentSerializer, AcademicReportSerializer, FollowUpRecordSerializer,
@@ -28,58 +27,32 @@ from .serializers import (
     SponsorSerializer, SponsorLookupSerializer, UserRegistrationSerializer, 
     UserSerializer, InviteUserSerializer, RoleSerializer, GroupSerializer,
     ChangePasswordSerializer, PasswordResetConfirmSerializer, PasswordResetRequestSerializer,
-    StudentDocumentSerializer, SponsorshipSerializer
+    StudentDocumentSerializer, SponsorshipSerializer, AIJobSerializer
 )
-from .pagination import StandardResultsSetPagination
-from . import ai_assistant
-from .permissions import HasModulePermission
+from .pagination import StandardResultsSetPagination, CursorOrPageNumberPagination
+from .importers import import_students
+from .caching import versioned_lookup_response
+from . import ai_assistant, ai_jobs, audit, audit_archive, background, dashboard, exports, llm, mailer, reports, search, sponsorships, tokens
+from .permissions import HasModulePermission, get_role_permissions
 
-import google.generativeai as genai
-import json
-from django.conf import settings
 from rest_framework.views import APIView
 
-try:
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
-except (AttributeError, TypeError):
-    print("WARNING: GOOGLE_API_KEY not configured in settings. AI features will not work.")
-    pass
-
 class AuditLoggingMixin:
     """Mixin to automatically log create, update, and delete actions."""
 
     def _log_action(self, request, instance, action, changes=None):
         user = request.user if request.user.is_authenticated else None
-        user_identifier = str(user) if user else "Anonymous"
-        content_type = ContentType.objects.get_for_model(instance.__class__)
-
-        AuditLog.objects.create(
-            user=user,
-            user_identifier=user_identifier,
-            action=action,
-            content_type=content_type,
-            object_id=instance.pk,
-            object_repr=str(instance),
-            changes=changes
-        )
+        audit.log_action(user, instance, action, changes)
 
     def perform_create(self, serializer):
         instance = serializer.save()
         self._log_action(self.request, instance, AuditLog.AuditAction.CREATE)
 
     def perform_update(self, serializer):
-        old_instance = self.get_object()
-        old_data = self.get_serializer(old_instance).data
-        
+        # Only the submitted model fields can change, so only those are snapshotted and diffed.
+        snapshot = audit.snapshot_fields(serializer.instance, serializer.validated_data.keys())
         instance = serializer.save()
-        new_data = self.get_serializer(instance).data
-        
-        changes = {}
-        for key, value in new_data.items():
-            old_value = old_data.get(key)
-            if isinstance(old_value, dict) and 'id' in old_value: old_value = old_value['id']
-            if value != old_value:
-                changes[key] = {'old': old_value, 'new': value}
+        changes = audit.diff_snapshot(instance, snapshot)
 
         if changes:
             self._log_action(self.request, instance, AuditLog.AuditAction.UPDATE, changes=changes)
@@ -114,19 +87,26 @@ class SponsorshipViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
         instance = serializer.save(student=student)
         self._log_action(self.request, instance, AuditLog.AuditAction.CREATE)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @transaction.atomic
+    def bulk_create(self, request):
+        if not isinstance(request.data, list): return Response({'error': 'Expected a list of sponsorships.'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user if request.user.is_authenticated else None
+        created, conflicts = sponsorships.assign_sponsorships(request.data, user)
+        return Response({
+            'createdCount': len(created),
+            'conflictCount': len(conflicts),
+            'created': SponsorshipSerializer(created, many=True).data,
+            'conflicts': conflicts,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 class StudentViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
     permission_classes = [HasModulePermission]
     module_name = 'students'
     
-    # --- MODIFIED: Changed sponsorship_set to sponsorships ---
-    queryset = Student.objects.prefetch_related(
-        'sponsorships__sponsor',
-        'academic_reports', 
-        'follow_up_records', 
-        'documents'
-    ).annotate(
-        sponsors_count=Count('sponsorships', filter=Q(sponsorships__end_date__isnull=True))
-    ).order_by('first_name', 'last_name')
+    queryset = Student.objects.order_by('first_name', 'last_name')
+    # Columns StudentListSerializer renders; list and all load nothing else.
+    list_fields = [field for field in StudentListSerializer.Meta.fields if field != 'sponsors_count']
 
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     pagination_class = StandardResultsSetPagination
@@ -141,6 +121,11 @@ class StudentViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        # Roster pages need a narrow projection; only a single student's page needs its relations.
+        if self.action in ('list', 'get_all'):
+            queryset = queryset.only(*self.list_fields).annotate(sponsors_count=sponsorships.active_sponsors_count())
+        elif self.action == 'retrieve':
+            queryset = queryset.prefetch_related(*self.nested_prefetches.values())
         student_status = self.request.query_params.get('student_status')
         sponsorship_status = self.request.query_params.get('sponsorship_status')
         gender = self.request.query_params.get('gender')
@@ -149,58 +134,74 @@ class StudentViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
         if student_status: queryset = queryset.filter(student_status=student_status)
         if sponsorship_status: queryset = queryset.filter(sponsorship_status=sponsorship_status)
         if gender: queryset = queryset.filter(gender=gender)
-        if sponsor_id: queryset = queryset.filter(sponsors__id=sponsor_id)
+        if sponsor_id: queryset = queryset.filter(sponsorships.sponsored_by(sponsor_id))
         return queryset
 
-    @action(detail=False, methods=['get'], url_path='all', pagination_class=None)
+    @action(detail=False, methods=['get'], url_path='all', pagination_class=None, renderer_classes=exports.EXPORT_RENDERER_CLASSES)
     def get_all(self, request):
         students = self.get_queryset()
+        if exports.is_export_request(request): return exports.stream_export(request, students, self.get_serializer(), 'students')
         serializer = self.get_serializer(students, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='lookup')
     def lookup(self, request):
-        students = Student.objects.order_by('first_name', 'last_name').only('student_id', 'first_name', 'last_name')
-        serializer = StudentLookupSerializer(students, many=True)
-        return Response(serializer.data)
+        def build_payload():
+            students = Student.objects.order_by('first_name', 'last_name').only('student_id', 'first_name', 'last_name')
+            return list(StudentLookupSerializer(students, many=True).data)
+        return versioned_lookup_response(request, Student, build_payload)
+
+    # Nested StudentSerializer relations and the prefetch each one needs.
+    nested_prefetches = {
+        'academic_reports': 'academic_reports',
+        'follow_up_records': 'follow_up_records',
+        'documents': 'documents',
+        'sponsorships': Prefetch('sponsorships', queryset=Sponsorship.objects.select_related('sponsor')),
+    }
 
     @action(detail=False, methods=['post'], url_path='bulk_details')
     def bulk_details(self, request):
+        """
+        Full student records for `student_ids`. Optional `fields` limits the output to the named
+        fields; optional `expand` names the nested relations to include (all of them by default,
+        none when `fields` is given unless listed there).
+        """
         student_ids = request.data.get('student_ids', [])
         if not student_ids: return Response([], status=status.HTTP_200_OK)
-        queryset = Student.objects.filter(student_id__in=student_ids)
-        serializer = self.get_serializer(queryset, many=True)
+        try:
+            fields, expand = self._list_param(request, 'fields'), self._list_param(request, 'expand')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        available = set(StudentSerializer().fields)
+        if unknown := (set(fields or []) | set(expand or [])) - available:
+            return Response({'error': f'Unknown fields: {", ".join(sorted(unknown))}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if fields is None and expand is None: selected = None
+        elif fields is None: selected = (available - set(self.nested_prefetches)) | set(expand)
+        else: selected = set(fields) | set(expand or [])
+        relations = self.nested_prefetches.keys() if selected is None else selected & self.nested_prefetches.keys()
+
+        queryset = self.get_queryset().filter(student_id__in=student_ids).prefetch_related(
+            *(self.nested_prefetches[relation] for relation in relations))
+        if selected is not None:
+            concrete = {field.name for field in Student._meta.concrete_fields}
+            queryset = queryset.only('student_id', *(selected & concrete))
+        serializer = StudentSerializer(queryset, many=True, fields=selected, context=self.get_serializer_context())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _list_param(request, name):
+        value = request.data.get(name, request.query_params.get(name))
+        if value is None: return None
+        if isinstance(value, str): return [item.strip() for item in value.split(',') if item.strip()]
+        if isinstance(value, list) and all(isinstance(item, str) for item in value): return value
+        raise ValueError(f'{name} must be a comma-separated string or a list of strings.')
+
     @action(detail=False, methods=['post'], url_path='bulk_import')
     @transaction.atomic
     def bulk_import(self, request):
-        students_data = request.data
-        created_count, updated_count, errors = 0, 0, []
-        required_fields_for_new = ['student_id', 'first_name', 'last_name']
-        incoming_ids = [s.get('student_id') for s in students_data if s.get('student_id')]
-        existing_student_ids = set(Student.objects.filter(student_id__in=incoming_ids).values_list('student_id', flat=True))
-        for student_data in students_data:
-            student_id = student_data.get('student_id')
-            if not student_id:
-                errors.append({"id": "Unknown", "message": "Missing student_id."})
-                continue
-            is_existing = student_id in existing_student_ids
-            if not is_existing:
-                missing_fields = [field for field in required_fields_for_new if not student_data.get(field)]
-                if missing_fields:
-                    errors.append({"id": student_id, "message": f"Missing required fields for new student: {', '.join(missing_fields)}"})
-                    continue
-            try:
-                defaults = {key: value for key, value in student_data.items() if key != 'student_id'}
-                for field in ['date_of_birth', 'eep_enroll_date', 'application_date', 'out_of_program_date']:
-                    if field in defaults and not defaults[field]: defaults.pop(field)
-                student, created = Student.objects.update_or_create(student_id=student_id, defaults=defaults)
-                if created: created_count += 1
-                else: updated_count += 1
-            except Exception as e: 
-                errors.append({"id": student_id, "message": str(e)})
-        return Response({ "createdCount": created_count, "updatedCount": updated_count, "skippedCount": len(errors), "errors": [f"{err['id']}: {err['message']}" for err in errors] })
+        if not isinstance(request.data, list): return Response({'error': 'Expected a list of students.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(import_students(request.data))
 
     @action(detail=False, methods=['post'], url_path='bulk_update')
     @transaction.atomic
@@ -261,13 +262,27 @@ class SponsorViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     search_fields = ['name', 'email']
-    ordering_fields = ['name', 'email', 'sponsorship_start_date', 'sponsored_student_count']
-    def get_queryset(self): return Sponsor.objects.annotate(sponsored_student_count=Count('sponsored_students')).order_by('name')
+    ordering_fields = ['name', 'email', 'sponsorship_start_date', 'sponsored_student_count', 'active_student_count', 'lifetime_student_count', 'latest_start_date']
+    # sponsored_student_count is the stored active count under its original name, so ?ordering= keeps working.
+    def get_queryset(self): return Sponsor.objects.annotate(sponsored_student_count=F('active_student_count')).order_by('name')
+    def perform_destroy(self, instance):
+        # The cascade deletes every sponsorship of this sponsor; recompute their students in one UPDATE.
+        with sponsorships.batched_status_updates(): super().perform_destroy(instance)
+    @action(detail=True, methods=['get'])
+    def portfolio(self, request, pk=None):
+        """Donor report: the sponsor's students, contract status and linked transaction totals (?start=&end= dates)."""
+        sponsor = self.get_object()
+        try:
+            start_date, end_date = (parse_date(value).date() if (value := request.query_params.get(key)) else None for key in ('start', 'end'))
+        except (ValueError, TypeError, OverflowError):
+            return Response({'error': 'Invalid date format provided.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'sponsor': self.get_serializer(sponsor).data, **sponsorships.sponsor_portfolio(sponsor, start_date, end_date)})
     @action(detail=False, methods=['get'], url_path='lookup')
     def lookup(self, request):
-        sponsors = Sponsor.objects.order_by('name').only('id', 'name')
-        serializer = SponsorLookupSerializer(sponsors, many=True)
-        return Response(serializer.data)
+        def build_payload():
+            sponsors = Sponsor.objects.order_by('name').only('id', 'name')
+            return list(SponsorLookupSerializer(sponsors, many=True).data)
+        return versioned_lookup_response(request, Sponsor, build_payload)
 
 class AcademicReportViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
     permission_classes = [HasModulePermission]
@@ -296,7 +311,8 @@ class TransactionViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
     module_name = 'transactions'
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = CursorOrPageNumberPagination
+    keyset_ordering = ('-date', '-id')
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['date', 'description', 'category', 'type', 'amount']
     def get_queryset(self):
@@ -304,7 +320,7 @@ class TransactionViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
         if type := self.request.query_params.get('type'): queryset = queryset.filter(type=type)
         if category := self.request.query_params.get('category'): queryset = queryset.filter(category=category)
         return queryset
-    @action(detail=False, methods=['get'], url_path='all', pagination_class=None)
+    @action(detail=False, methods=['get'], url_path='all', pagination_class=None, renderer_classes=exports.EXPORT_RENDERER_CLASSES)
     def get_all(self, request):
         start_date_str, end_date_str = request.query_params.get('start'), request.query_params.get('end')
         queryset = self.get_queryset().order_by('date')
@@ -314,6 +330,7 @@ class TransactionViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
                 queryset = queryset.filter(date__range=[start_date, end_date])
             except (ValueError, TypeError):
                 return Response({'error': 'Invalid date format provided.'}, status=status.HTTP_400_BAD_REQUEST)
+        if exports.is_export_request(request): return exports.stream_export(request, queryset, self.get_serializer(), 'transactions')
         return Response(self.get_serializer(queryset, many=True).data)
 
 class GovernmentFilingViewSet(AuditLoggingMixin, viewsets.ModelViewSet):
@@ -345,7 +362,8 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     module_name = 'audit'
     queryset = AuditLog.objects.select_related('content_type').all()
     serializer_class = AuditLogSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = CursorOrPageNumberPagination
+    keyset_ordering = ('-timestamp', '-id')
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['timestamp', 'user_identifier', 'action', 'object_repr']
     def get_queryset(self):
@@ -357,6 +375,20 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
                 queryset = queryset.filter(content_type=content_type)
             except ContentType.DoesNotExist: return AuditLog.objects.none() 
         return queryset
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def archived(self, request):
+        """Audit rows already moved to archive files, for ?start=&end= (dates are inclusive), newest first."""
+        start_str, end_str = request.query_params.get('start'), request.query_params.get('end')
+        try:
+            start, end = parse_date(start_str), parse_date(end_str)
+        except (ValueError, TypeError, OverflowError):
+            return Response({'error': "Valid 'start' and 'end' dates are required."}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = (timezone.make_aware(d) if timezone.is_naive(d) else d for d in (start, end))
+        if len(end_str) <= 10: end += timedelta(days=1)
+        rows, truncated = audit_archive.read_archived(
+            start, end, request.query_params.get('action'), request.query_params.get('object_type'),
+        )
+        return Response({'results': rows, 'truncated': truncated})
 
 class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
@@ -373,7 +405,9 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [HasModulePermission]
     module_name = 'users'
     serializer_class = UserSerializer
-    def get_queryset(self): return User.objects.all().order_by('username')
+    pagination_class = StandardResultsSetPagination
+    # One query for all groups and their role profiles, whatever the page size.
+    def get_queryset(self): return User.objects.prefetch_related(Prefetch('groups', queryset=Group.objects.select_related('roleprofile'))).order_by('username')
     def update(self, request, *args, **kwargs):
         user, role_name, status_name = self.get_object(), request.data.get('role'), request.data.get('status')
         try:
@@ -397,9 +431,10 @@ class UserViewSet(viewsets.ModelViewSet):
                 user = User.objects.create_user(username=username, email=email, is_active=False)
                 user.set_unusable_password(); user.save()
                 user.groups.add(Group.objects.get(name=role_name))
+                mailer.send_invitation(user, role_name)
         except Group.DoesNotExist: return Response({'error': f"Role '{role_name}' does not exist."}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e: return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return Response({'message': f'Invitation created for {email}. The user must be activated.'}, status=status.HTTP_201_CREATED)
+        return Response({'message': f'Invitation sent to {email}. The account activates when they set a password.'}, status=status.HTTP_201_CREATED)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -409,29 +444,7 @@ def dashboard_stats(request):
         end_date = parse_date(end_date_str).date() if end_date_str else date.today()
         start_date = parse_date(start_date_str).date() if start_date_str else end_date - timedelta(days=29)
     except (ValueError, TypeError): end_date, start_date = date.today(), date.today() - timedelta(days=29)
-    period_duration = end_date - start_date
-    prev_end_date, prev_start_date = start_date - timedelta(days=1), (start_date - timedelta(days=1)) - period_duration
-    def get_stats_for_period(start, end):
-        tx = Transaction.objects.filter(date__range=[start, end])
-        income = tx.filter(type='Income').aggregate(total=Sum('amount'))['total'] or 0
-        expense = tx.filter(type='Expense').aggregate(total=Sum('amount'))['total'] or 0
-        students = Student.objects.filter(eep_enroll_date__lte=end)
-        total_students = students.count()
-        active_students = students.filter((Q(out_of_program_date__gte=start) | Q(out_of_program_date__isnull=True)) & Q(student_status=StudentStatus.ACTIVE)).count()
-        return { "net_balance": float(income - expense), "active_students": active_students, "total_students": total_students }
-    current_period_stats = get_stats_for_period(start_date, end_date)
-    previous_period_stats = get_stats_for_period(prev_start_date, prev_end_date)
-    upcoming_filings = GovernmentFiling.objects.filter(due_date__gte=date.today()).count()
-    status_dist = { item['student_status']: item['value'] for item in Student.objects.filter(eep_enroll_date__lte=end_date).values('student_status').annotate(value=Count('student_id')) }
-    monthly_breakdown = []
-    current_month_start = end_date.replace(day=1)
-    for i in range(12):
-        month_start = (current_month_start - timedelta(days=i*30)).replace(day=1)
-        month_end = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-        income_m = Transaction.objects.filter(type='Income', date__range=[month_start, month_end]).aggregate(total=Sum('amount'))['total'] or 0
-        expense_m = Transaction.objects.filter(type='Expense', date__range=[month_start, month_end]).aggregate(total=Sum('amount'))['total'] or 0
-        monthly_breakdown.append({'month': month_start.strftime('%b %y'), 'income': float(income_m), 'expense': float(expense_m)})
-    return Response({ 'stats': { 'total_students': current_period_stats['total_students'], 'active_students': current_period_stats['active_students'], 'net_balance': current_period_stats['net_balance'], 'upcoming_filings': upcoming_filings }, 'trends': { 'total_students': previous_period_stats['total_students'], 'active_students': previous_period_stats['active_students'], 'net_balance': previous_period_stats['net_balance'] }, 'student_status_distribution': status_dist, 'monthly_breakdown': list(reversed(monthly_breakdown)) })
+    return Response(dashboard.get_dashboard_stats(start_date, end_date))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -440,46 +453,80 @@ def recent_transactions(request):
     serializer = TransactionSerializer(recent, many=True)
     return Response(serializer.data)
 
+class SearchView(APIView):
+    """Ranked, typo-tolerant search across students, sponsors and transactions: GET /api/search/?q=...&type=student,sponsor"""
+    permission_classes = [IsAuthenticated]
+    # Result type -> module whose read permission it requires.
+    type_modules = {'student': 'students', 'sponsor': 'sponsors', 'transaction': 'transactions'}
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query: return Response({'error': "The 'q' parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try: limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError: return Response({'error': "'limit' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        requested = [t for t in request.query_params.get('type', '').split(',') if t] or list(self.type_modules)
+        if unknown := set(requested) - set(self.type_modules):
+            return Response({'error': f"Unknown type(s): {', '.join(sorted(unknown))}."}, status=status.HTTP_400_BAD_REQUEST)
+        role_permissions = {} if request.user.is_superuser else get_role_permissions(request.user)
+        kinds = [t for t in requested if request.user.is_superuser or role_permissions.get(self.type_modules[t], {}).get('read')]
+        return Response({'query': query, 'results': search.search(query, kinds=kinds, limit=limit)})
+
+def _ai_job_response(job, headers=None):
+    finished = job.status in (AIJob.Status.SUCCEEDED, AIJob.Status.FAILED)
+    return Response(AIJobSerializer(job).data, status=status.HTTP_200_OK if finished else status.HTTP_202_ACCEPTED, headers=headers)
+
 class AIAssistantStudentFilterView(APIView):
+    """Queues a natural-language -> student filter translation; poll the returned job for the filters."""
+    permission_classes = [IsAuthenticated]
+
     def post(self, request, *args, **kwargs):
-        if not settings.GOOGLE_API_KEY: return Response({"error": "AI Assistant is not configured on the server."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if not llm.is_configured(): return Response({"error": "AI Assistant is not configured on the server."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         query = request.data.get('query')
         if not query: return Response({"error": "Query parameter is missing."}, status=status.HTTP_400_BAD_REQUEST)
-        prompt = f"""You are an expert data analyst for an NGO. Your task is to convert a user's natural language query into a JSON object of filters for a student database.
-            The available filters and their exact possible values are:
-            - "student_status": ["Active", "Inactive", "Pending Qualification"]
-            - "sponsorship_status": ["Sponsored", "Unsponsored"]
-            - "gender": ["Male", "Female", "Other"]
-            - "sponsor_name": This should be a string representing the sponsor's name if mentioned.
-            - "search": This should be a string for a general text search on the student's first or last name if a specific name is mentioned.
-            Analyze the user's query: "{query}"
-            Your response MUST be only the JSON object, with no extra text, explanation, or formatting like markdown ```json blocks.
-            If a filter is not mentioned, do not include it in the JSON. If a name is mentioned, use the "search" key. If a sponsor's name is mentioned, use the "sponsor_name" key."""
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            ai_response = model.generate_content(prompt)
-            cleaned_text = ai_response.text.strip().replace("```json", "").replace("```", "").strip()
-            filters = json.loads(cleaned_text)
-            return Response(filters, status=status.HTTP_200_OK)
-        except json.JSONDecodeError: return Response({"error": "The AI returned an invalid format. Please try rephrasing your query."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            print(f"Error calling Gemini API: {e}")
-            return Response({"error": "There was a problem communicating with the AI assistant."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        payload = {'query': query}
+        filters = ai_assistant.cached_student_filters(query)
+        if filters is not None:
+            job = ai_jobs.record_completed_job(request.user, AIJob.Kind.STUDENT_FILTERS, payload, filters)
+            return _ai_job_response(job, headers={'X-AI-Cache': 'hit'})
+        return _ai_job_response(ai_jobs.submit_job(request.user, AIJob.Kind.STUDENT_FILTERS, payload), headers={'X-AI-Cache': 'miss'})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def query_ai_assistant(request):
     prompt, history = request.data.get('prompt'), request.data.get('history', [])
     if not prompt: return Response({'error': 'A prompt is required.'}, status=status.HTTP_400_BAD_REQUEST)
-    try: return Response({'response': ai_assistant.query_assistant(prompt, history)})
-    except Exception as e:
-        print(f"Error in AI assistant view: {e}")
-        return Response({'error': 'An internal error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return _ai_job_response(ai_jobs.submit_job(request.user, AIJob.Kind.ASSISTANT_QUERY, {'prompt': prompt, 'history': history}))
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def ai_metrics(request):
+    return Response({'filterCache': ai_assistant.student_filter_cache.stats(), 'llm': llm.metrics.snapshot()})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ai_job_detail(request, job_id):
+    jobs = AIJob.objects.filter(user=request.user)
+    ai_jobs.expire_stale_jobs(jobs.filter(pk=job_id))
+    job = jobs.filter(pk=job_id).first()
+    if job is None: return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(AIJobSerializer(job).data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_report(request, token):
+    # The signed, expiring token names the file; the caller still needs read access to its module.
+    resolved = reports.resolve_download(token)
+    if resolved is None: raise Http404("This report link is invalid or has expired.")
+    path, filename, module = resolved
+    if not request.user.is_superuser and not get_role_permissions(request.user).get(module, {}).get('read', False):
+        raise PermissionDenied("You do not have permission to download this report.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_current_user(request):
-    return Response(UserSerializer(request.user).data)
+    # Needs email and last_login, which the token claims don't carry.
+    return Response(UserSerializer(tokens.database_user(request.user)).data)
 
 class ChangePasswordView(generics.GenericAPIView):
     serializer_class = ChangePasswordSerializer
@@ -494,14 +541,8 @@ class PasswordResetRequestView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = PasswordResetRequestSerializer(data=request.data)
         if serializer.is_valid():
-            email = serializer.validated_data['email']
-            try:
-                user = User.objects.get(email__iexact=email)
-                frontend_base_url = settings.CORS_ALLOWED_ORIGINS[0] if settings.CORS_ALLOWED_ORIGINS else 'http://localhost:5173'
-                uidb64, token = urlsafe_base64_encode(force_bytes(user.pk)), default_token_generator.make_token(user)
-                reset_link = f"{frontend_base_url}/#/reset-password/{uidb64}/{token}"
-                send_mail('Set Your Password for NGO Dashboard', f'Hello,\n\nPlease click the link below to set your password:\n\n{reset_link}\n\nIf you did not request this, please ignore this email.\n\nThanks,\nNGO Dashboard Team', 'noreply@extremelove.com', [user.email], fail_silently=False)
-            except User.DoesNotExist: pass
+            # The lookup happens off the request too, so response time says nothing about the account.
+            background.submit(mailer.send_password_reset, serializer.validated_data['email'])
         return Response({"message": "If an account with this email exists, a password reset link has been sent."}, status=status.HTTP_200_OK)
 
 class PasswordResetConfirmView(generics.GenericAPIView):
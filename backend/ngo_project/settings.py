@@ -1,6 +1,6 @@
 # backend/ngo_project/settings.py
 
-import os, dj_database_url
+import os, tempfile, dj_database_url
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import timedelta
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'whitenoise.runserver_nostatic', # For serving static files
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Trigram lookups for search; inert on other databases
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -169,7 +170,8 @@ JAZZMIN_SETTINGS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Read requests are authorized from the access token's role claims without a DB lookup.
+        'core.tokens.StatelessJWTAuthentication',
     )
 }
 
@@ -198,6 +200,9 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
     "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    # Access tokens carry role, permissions and an auth revision (see core.tokens).
+    "TOKEN_OBTAIN_SERIALIZER": "core.tokens.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.tokens.RoleTokenRefreshSerializer",
 
     "JTI_CLAIM": "jti",
 
@@ -206,6 +211,69 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# --- Cache Configuration ---
+# Without REDIS_URL each worker process keeps its own in-memory cache. Invalidation
+# signals then only reach the process that handled the change, and other workers
+# pick it up when their entry expires.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+# Read requests authenticate from access-token claims alone (see core.tokens). This needs
+# the auth revisions in a cache every worker shares, so it is only on with REDIS_URL.
+STATELESS_JWT_AUTH = bool(REDIS_URL)
+
+# Seconds a user's resolved role permissions stay cached (see core.permissions).
+ROLE_PERMISSIONS_CACHE_TIMEOUT = int(os.environ.get('ROLE_PERMISSIONS_CACHE_TIMEOUT', 300))
+# Seconds a student/sponsor lookup payload stays cached (see core.caching).
+LOOKUP_CACHE_TIMEOUT = int(os.environ.get('LOOKUP_CACHE_TIMEOUT', 60))
+# Table versions (the lookup ETags) never expire in a shared cache, so 304s survive idle
+# periods and every worker agrees. Per-process LocMem can't see other workers' bumps, so
+# there they expire with the payload to bound staleness; stable ETags need REDIS_URL.
+LOOKUP_VERSION_TIMEOUT = None if REDIS_URL else LOOKUP_CACHE_TIMEOUT
+# Seconds between rebuilds of the in-process typo-tolerance vocabulary (see core.search).
+SEARCH_VOCABULARY_TTL = int(os.environ.get('SEARCH_VOCABULARY_TTL', 300))
+
+# --- AI Assistant ---
+GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY') or os.environ.get('API_KEY')
+# Dotted path of the LLM client class; 'core.llm.FakeLLMClient' answers without calling Gemini.
+AI_LLM_CLIENT = os.environ.get('AI_LLM_CLIENT', 'core.llm.GeminiClient')
+AI_MODEL_NAME = os.environ.get('AI_MODEL_NAME', 'gemini-2.5-flash')
+# Seconds a single LLM API request may take before it is abandoned.
+AI_REQUEST_TIMEOUT = int(os.environ.get('AI_REQUEST_TIMEOUT', 30))
+# Threads per server process that run AI jobs, so slow LLM calls never hold a request worker.
+AI_WORKER_THREADS = int(os.environ.get('AI_WORKER_THREADS', 4))
+# Seconds after which an unfinished AI job is reported as failed (e.g. its process restarted).
+AI_JOB_TIMEOUT = int(os.environ.get('AI_JOB_TIMEOUT', 120))
+# Per-process cache of natural-language -> student filter translations (see core.ai_assistant).
+AI_FILTER_CACHE_SIZE = int(os.environ.get('AI_FILTER_CACHE_SIZE', 512))
+AI_FILTER_CACHE_TTL = int(os.environ.get('AI_FILTER_CACHE_TTL', 3600))
+# Run background work inline in the submitting thread (tests, debugging).
+BACKGROUND_TASKS_EAGER = os.environ.get('BACKGROUND_TASKS_EAGER', 'False').lower() == 'true'
+
+# --- Generated reports ---
+# Report files are written here and served through signed links that expire after REPORT_DOWNLOAD_TTL seconds.
+REPORTS_ROOT = os.environ.get('REPORTS_ROOT', os.path.join(tempfile.gettempdir(), 'ngo_reports'))
+REPORT_DOWNLOAD_TTL = int(os.environ.get('REPORT_DOWNLOAD_TTL', 3600))
+
+# --- Audit log retention (see core.audit_archive) ---
+# Audit rows older than this many days are moved to gzip NDJSON files under AUDIT_ARCHIVE_ROOT
+# by `manage.py archive_audit_logs`; run it daily from cron.
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get('AUDIT_LOG_RETENTION_DAYS', 365))
+AUDIT_ARCHIVE_ROOT = os.environ.get('AUDIT_ARCHIVE_ROOT', os.path.join(BASE_DIR, 'audit_archive'))
+# Most rows one archived-range query returns.
+AUDIT_ARCHIVE_QUERY_LIMIT = int(os.environ.get('AUDIT_ARCHIVE_QUERY_LIMIT', 1000))
+
+# --- Outbound email queue (see core.mailer) ---
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+# Retry n waits EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2**(n-1), capped at EMAIL_OUTBOX_RETRY_MAX_SECONDS.
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get('EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600))
+# Sender used for account emails (password reset, invitations).
+ACCOUNT_EMAIL_FROM = os.environ.get('ACCOUNT_EMAIL_FROM', 'noreply@extremelove.com')
+
 # --- THIS IS THE NEW SETTING YOU NEED TO ADD ---
 # This tells Django to use our new email/username login logic.
 AUTHENTICATION_BACKENDS = [
@@ -30,10 +30,24 @@ const AIAssistant: React.FC = () => {
     useEffect(scrollToBottom, [messages]);
 
     const handleReportGeneration = (reportPayload: any) => {
-        const { type, format, data, startDate, endDate } = reportPayload;
+        const { type, format, data, startDate, endDate, downloadUrl, filename, rowCount } = reportPayload;
         const now = new Date().toISOString().split('T')[0];
 
-        if (type === 'student_roster') {
+        if (downloadUrl) {
+            // CSV/XLSX reports are written on the server; the link is signed and short-lived.
+            if (rowCount === 0) {
+                showToast('The report has no matching rows.', 'info');
+            }
+            api.downloadReport(downloadUrl).then(blob => {
+                const link = document.createElement('a');
+                link.href = URL.createObjectURL(blob);
+                link.download = filename;
+                document.body.appendChild(link);
+                link.click();
+                link.remove();
+                URL.revokeObjectURL(link.href);
+            }).catch((error: any) => showToast(error.message || 'Failed to download the report.', 'error'));
+        } else if (type === 'student_roster') {
             if (!data || data.length === 0) {
                 showToast('The AI assistant returned no student data to generate a report.', 'info');
                 return;
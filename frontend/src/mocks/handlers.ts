@@ -80,8 +80,10 @@ export const handlers = [
   // --- AI FEATURES ---
   http.post(`${API_BASE_URL}/ai-assistant/query/`, () => {
     return HttpResponse.json({
-      response: 'This is a mocked response from the AI assistant. I can help you find data or generate reports.',
-    });
+      id: 'mock-assistant-job',
+      status: 'succeeded',
+      result: { response: 'This is a mocked response from the AI assistant. I can help you find data or generate reports.' },
+    }, { status: 202 });
   }),
 
   http.post(`${API_BASE_URL}/ai-assistant/student-filters/`, async ({ request }) => {
@@ -103,6 +105,6 @@ export const handlers = [
         filters.search = nameMatch[2].trim();
     }
 
-    return HttpResponse.json(filters);
+    return HttpResponse.json({ id: 'mock-filter-job', status: 'succeeded', result: filters }, { status: 202 });
   }),
 ];
\ No newline at end of file
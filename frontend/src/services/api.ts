@@ -1,7 +1,7 @@
-import { Student, Transaction, GovernmentFiling, Task, AcademicReport, FollowUpRecord, PaginatedResponse, StudentLookup, AuditLog, Sponsor, SponsorLookup, User, AppUser, Role, Permissions, DocumentType, Sponsorship } from '../types.ts';
+import { Student, Transaction, GovernmentFiling, Task, AcademicReport, FollowUpRecord, PaginatedResponse, StudentLookup, AuditLog, Sponsor, SponsorLookup, SponsorPortfolio, User, AppUser, Role, Permissions, DocumentType, Sponsorship } from '../types.ts';
 import { convertKeysToCamel, convertKeysToSnake } from '../utils/caseConverter.ts';
 
-const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000/api';
+export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000/api';
 
 const logDebugEvent = (message: string, type: 'api_success' | 'api_error' | 'info', duration?: number) => {
     window.dispatchEvent(new CustomEvent('debug-log', { detail: { message, type, duration } }));
@@ -225,13 +225,32 @@ const prepareTransactionData = (data: any) => {
     return snakeData;
 };
 
+// AI requests run as background jobs on the server; poll until the job finishes.
+const AI_JOB_POLL_INTERVAL_MS = 1000;
+const AI_JOB_MAX_WAIT_MS = 120000;
+
+const waitForAIJob = async (job: any): Promise<any> => {
+    const startedAt = Date.now();
+    while (job.status === 'pending' || job.status === 'running') {
+        if (Date.now() - startedAt > AI_JOB_MAX_WAIT_MS) {
+            throw new Error('The AI assistant took too long to respond. Please try again.');
+        }
+        await new Promise(resolve => setTimeout(resolve, AI_JOB_POLL_INTERVAL_MS));
+        job = await apiClient(`/ai-assistant/jobs/${job.id}/`);
+    }
+    if (job.status === 'failed') {
+        throw new Error(job.error || 'The AI assistant could not process your request.');
+    }
+    return job.result;
+};
+
 const queryAIAssistantForStudentFilters = async (query: string): Promise<any> => {
     try {
-        const response = await apiClient('/ai-assistant/student-filters/', {
+        const job = await apiClient('/ai-assistant/student-filters/', {
             method: 'POST',
             body: JSON.stringify({ query })
         });
-        return response;
+        return await waitForAIJob(job);
     } catch (error) {
         console.error("Error querying AI for filters:", error);
         throw new Error("The AI assistant could not process your request. Please try again.");
@@ -366,6 +385,7 @@ export const api = {
     getFilings: async (queryString: string): Promise<PaginatedResponse<GovernmentFiling>> => apiClient(`/filings/?${queryString}`),
     getTasks: async (queryString: string): Promise<PaginatedResponse<Task>> => apiClient(`/tasks/?${queryString}`),
     getAuditLogs: async (queryString: string): Promise<PaginatedResponse<AuditLog>> => apiClient(`/audit-logs/?${queryString}`),
+    getArchivedAuditLogs: async (queryString: string): Promise<{ results: AuditLog[]; truncated: boolean }> => apiClient(`/audit-logs/archived/?${queryString}`),
     getSponsors: async (queryString: string): Promise<PaginatedResponse<Sponsor>> => apiClient(`/sponsors/?${queryString}`),
 
     // LOOKUPS (for dropdowns)
@@ -532,6 +552,19 @@ export const api = {
 
     // Sponsor Endpoints
     getSponsorById: async (id: string): Promise<Sponsor> => apiClient(`/sponsors/${id}/`),
+    // Report files are only served to signed-in users with read access, so they are fetched with the token.
+    downloadReport: async (downloadUrl: string): Promise<Blob> => {
+        const token = localStorage.getItem('accessToken');
+        const response = await fetch(`${new URL(API_BASE_URL).origin}${downloadUrl}`, {
+            headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+        });
+        if (!response.ok) {
+            const message = response.status === 404 ? 'This report link is invalid or has expired.' : `Report download failed with status ${response.status}.`;
+            throw new ApiError(message, response.status, null);
+        }
+        return response.blob();
+    },
+    getSponsorPortfolio: async (id: string, queryString = ''): Promise<SponsorPortfolio> => apiClient(`/sponsors/${id}/portfolio/?${queryString}`),
     addSponsor: async (data: Omit<Sponsor, 'id' | 'sponsoredStudentCount'>): Promise<Sponsor> => apiClient('/sponsors/', { method: 'POST', body: JSON.stringify(convertKeysToSnake(data)) }),
     updateSponsor: async (data: Omit<Sponsor, 'sponsoredStudentCount'>): Promise<Sponsor> => {
         const { id, ...rest } = data;
@@ -543,6 +576,9 @@ export const api = {
     addSponsorship: async (data: any): Promise<Sponsorship> => {
         return apiClient('/sponsorships/', { method: 'POST', body: JSON.stringify(convertKeysToSnake(data)) });
     },
+    addSponsorshipsBulk: async (rows: any[]): Promise<{ createdCount: number; conflictCount: number; created: Sponsorship[]; conflicts: { index: number; student: string; sponsor: number; message: string }[] }> => {
+        return apiClient('/sponsorships/bulk/', { method: 'POST', body: JSON.stringify(convertKeysToSnake(rows)) });
+    },
     updateSponsorship: async (id: number, data: any): Promise<Sponsorship> => {
         return apiClient(`/sponsorships/${id}/`, { method: 'PATCH', body: JSON.stringify(convertKeysToSnake(data)) });
     },
@@ -552,10 +588,11 @@ export const api = {
 
     // AI Assistant
     queryAIAssistant: async (prompt: string, conversationHistory: any[]): Promise<{ response: string }> => {
-        return apiClient('/ai-assistant/query/', {
+        const job = await apiClient('/ai-assistant/query/', {
             method: 'POST',
             body: JSON.stringify({ prompt, history: conversationHistory })
         });
+        return waitForAIJob(job);
     },
     queryAIAssistantForStudentFilters,
 };
\ No newline at end of file
@@ -362,4 +362,30 @@ export interface Sponsor {
     email: string;
     sponsorshipStartDate: string;
     sponsoredStudentCount: number;
+    activeStudentCount?: number;
+    lifetimeStudentCount?: number;
+    latestStartDate?: string | null;
+}
+
+export interface SponsorPortfolioStudent {
+    studentId: string;
+    firstName: string;
+    lastName: string;
+    studentStatus: StudentStatus;
+    sponsorshipStatus: SponsorshipStatus;
+    startDate: string;
+    endDate: string | null;
+    active: boolean;
+    hasSponsorshipContract: boolean;
+    transactions: { income: number; expense: number; count: number };
+}
+
+export interface SponsorPortfolio {
+    sponsor: Sponsor;
+    activeStudentCount: number;
+    lifetimeStudentCount: number;
+    activeWithContract: number;
+    activeWithoutContract: number;
+    transactions: { income: number; expense: number; net: number };
+    students: SponsorPortfolioStudent[];
 }
\ No newline at end of file